@@ -1,8 +1,14 @@
 import asyncio
 import functools
 import random
+from bisect import bisect_right
+from inspect import Parameter, signature
+from itertools import accumulate
 
 _SCENARIO = {}
+# (scenarios, cumulative weights) used by pick_scenario(),
+# built on first pick and reset when a scenario is registered
+_PICK_TABLE = None
 
 
 def get_scenarios():
@@ -20,6 +26,28 @@ def _check_coroutine(func):
         raise TypeError("%s needs to be a coroutine" % str(func))
 
 
+def _session_options(func):
+    """Returns the session kind and its options, given the scenario signature.
+
+    When the function has a `session_factory` argument with a default value,
+    that value is the session kind and the default values of the other
+    arguments are passed to the session factory.
+    """
+    sig = signature(func)
+    session_kind = sig.parameters.get("session_factory")
+
+    if session_kind is None or session_kind.default in (None, Parameter.empty):
+        return "http", {}
+
+    options = {}
+    for name, param in sig.parameters.items():
+        if name == "session_factory" or param.default is Parameter.empty:
+            continue
+        options[name] = param.default
+
+    return session_kind.default, options
+
+
 def scenario(weight=1, delay=0.0, name=None):
     """Decorator to register a function as a Molotov test.
 
@@ -48,6 +76,7 @@ def scenario(weight=1, delay=0.0, name=None):
         _check_coroutine(func)
         if weight > 0:
             sname = name or func.__name__
+            session_kind, session_options = _session_options(func)
             data = {
                 "name": sname,
                 "weight": weight,
@@ -55,8 +84,11 @@ def scenario(weight=1, delay=0.0, name=None):
                 "func": func,
                 "args": args,
                 "kw": kw,
+                "session_kind": session_kind,
+                "session_options": session_options,
             }
             _SCENARIO[sname] = data
+            _reset_pick_table()
 
         @functools.wraps(func)
         def __scenario(*args, **kw):
@@ -67,21 +99,30 @@ def scenario(weight=1, delay=0.0, name=None):
     return _scenario
 
 
+def _reset_pick_table():
+    global _PICK_TABLE
+    _PICK_TABLE = None
+
+
+def _get_pick_table():
+    global _PICK_TABLE
+    if _PICK_TABLE is None:
+        scenarios = get_scenarios()
+        weights = list(accumulate(item["weight"] for item in scenarios))
+        _PICK_TABLE = scenarios, weights
+    return _PICK_TABLE
+
+
 def pick_scenario(worker_id=0, step_id=0):
     custom_picker = get_fixture("scenario_picker")
     if custom_picker is not None:
         name = custom_picker(worker_id, step_id)
         return get_scenario(name)
 
-    scenarios = get_scenarios()
-    total = sum(item["weight"] for item in scenarios)
-    selection = random.uniform(0, total)
-    upto = 0
-    for item in scenarios:
-        weight = item["weight"]
-        if upto + weight > selection:
-            return item
-        upto += weight
+    scenarios, weights = _get_pick_table()
+    if not weights:
+        return None
+    return scenarios[bisect_right(weights, random.random() * weights[-1])]
 
 
 def next_scenario():
@@ -0,0 +1,83 @@
+import asyncio
+import os
+
+from aiohttp import ClientConnectionError, ClientResponseError, ServerDisconnectedError
+
+# counters of the failures, by category
+FAILURE_CATEGORIES = (
+    "FAILED_ASSERTION",
+    "FAILED_TIMEOUT",
+    "FAILED_CONNECTION",
+    "FAILED_DISCONNECT",
+    "FAILED_HTTP",
+    "FAILED_OTHER",
+)
+# counters of the responses with an error status
+HTTP_CLASSES = ("HTTP_4XX", "HTTP_5XX")
+
+
+def fingerprint(error):
+    """Returns the type of the error and the place it was raised from.
+
+    The origin is the innermost frame of the traceback, as
+    `"ValueError at scenario.py:12"`, so failures coming from the same line
+    are counted together whatever their message. Unlike formatting the
+    traceback, this doesn't read any source file.
+    """
+    name = type(error).__name__
+    tb = error.__traceback__
+    if tb is None:
+        return name
+    while tb.tb_next is not None:
+        tb = tb.tb_next
+    filename = os.path.basename(tb.tb_frame.f_code.co_filename)
+    return "%s at %s:%d" % (name, filename, tb.tb_lineno)
+
+
+def classify(error):
+    """Returns the counter of the failure category of the error."""
+    if isinstance(error, AssertionError):
+        return "FAILED_ASSERTION"
+    # aiohttp timeouts are also connection errors
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError)):
+        return "FAILED_TIMEOUT"
+    if isinstance(error, ServerDisconnectedError):
+        return "FAILED_DISCONNECT"
+    if isinstance(error, (ClientConnectionError, ConnectionError)):
+        return "FAILED_CONNECTION"
+    if isinstance(error, ClientResponseError):
+        return "FAILED_HTTP"
+    return "FAILED_OTHER"
+
+
+def status_class(status):
+    """Returns the counter of an error status, or None for other statuses."""
+    if 400 <= status < 600:
+        return HTTP_CLASSES[status // 100 - 4]
+    return None
+
+
+def format_categories(results):
+    """Returns the counters of the categories that are not zero, in one line."""
+    counts = []
+    for name in FAILURE_CATEGORIES + HTTP_CLASSES:
+        if results.get(name, 0) > 0:
+            counts.append("%s: %d" % (name.replace("FAILED_", ""), results[name]))
+    return " | ".join(counts)
+
+
+def top_errors(counts, limit=5):
+    """Returns the `limit` most frequent errors, as (origin, count) pairs."""
+    return sorted(counts.items(), key=lambda item: (-item[1], item[0]))[:limit]
+
+
+def format_errors(counts, limit=10):
+    """Returns a table with the most frequent errors and their count."""
+    errors = top_errors(counts, limit)
+    width = max(len("ERROR"), *(len(origin) for origin, _ in errors))
+    lines = ["ERROR".ljust(width) + "COUNT".rjust(11)]
+    for origin, count in errors:
+        lines.append(origin.ljust(width) + str(count).rjust(11))
+    if len(counts) > limit:
+        lines.append("(%d more)" % (len(counts) - limit))
+    return "\n".join(lines)
@@ -1,3 +1,4 @@
+import functools
 import io
 
 import aiohttp
@@ -12,10 +13,14 @@ _COMPRESSED = ("gzip", "compress", "deflate", "identity", "br")
 
 
 class BaseListener:
+    def get_handler(self, event):
+        """Returns the method called for `event`, or None."""
+        return getattr(self, "on_" + event, None)
+
     async def __call__(self, event, **options):
-        attr = getattr(self, "on_" + event, None)
-        if attr is not None:
-            await attr(**options)
+        handler = self.get_handler(event)
+        if handler is not None:
+            await handler(**options)
 
 
 class Writer:
@@ -32,6 +37,12 @@ class StdoutListener(BaseListener):
         self.loop = options.pop("loop", None)
         self.console = options["console"]
 
+    def get_handler(self, event):
+        # requests and responses are only displayed with -vv
+        if self.verbose < 2:
+            return None
+        return super().get_handler(event)
+
     async def _body2str(self, body):
         if body is None:
             return ""
@@ -111,12 +122,24 @@ class CustomListener:
         await self.fixture(event, **options)
 
 
+class _NoListener:
+    """Awaitable returned when no listener subscribes to an event."""
+
+    def __await__(self):
+        return iter(())
+
+
+_NO_LISTENER = _NoListener()
+
+
 class EventSender:
     def __init__(self, console, listeners=None):
         self.console = console
         if listeners is None:
             listeners = []
         self._listeners = listeners
+        # event -> handlers, built on the first send of each event
+        self._handlers = {}
         self._stopped = False
 
         fixture_listeners = get_fixture("events")
@@ -126,6 +149,19 @@ class EventSender:
 
     def add_listener(self, listener):
         self._listeners.append(listener)
+        self._handlers.clear()
+
+    def _get_handlers(self, event):
+        handlers = []
+        for listener in self._listeners:
+            if isinstance(listener, BaseListener):
+                handler = listener.get_handler(event)
+                if handler is not None:
+                    handlers.append(handler)
+            else:
+                handlers.append(functools.partial(listener, event))
+        self._handlers[event] = handlers
+        return handlers
 
     async def stop(self):
         self._stopped = True
@@ -133,9 +169,22 @@ class EventSender:
     def stopped(self):
         return self._stopped
 
-    async def send_event(self, event, *args, **options):
-        for listener in self._listeners:
+    def send_event(self, event, *args, **options):
+        """Sends an event to the listeners that subscribed to it.
+
+        Returns an awaitable. When no listener subscribed, it does
+        not create a coroutine.
+        """
+        handlers = self._handlers.get(event)
+        if handlers is None:
+            handlers = self._get_handlers(event)
+        if not handlers:
+            return _NO_LISTENER
+        return self._send_event(handlers, *args, **options)
+
+    async def _send_event(self, handlers, *args, **options):
+        for handler in handlers:
             try:
-                await listener(event, *args, **options)
+                await handler(*args, **options)
             except Exception as e:
                 self.console.print_error(e)
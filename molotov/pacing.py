@@ -0,0 +1,55 @@
+from time import perf_counter
+
+from molotov.util import cancellable_sleep, is_stopped
+
+
+class Pacer:
+    """Paces the iterations of a worker, start to start.
+
+    :meth:`wait` returns when the next iteration can start, so a worker
+    starts an iteration every `interval` seconds whatever the time the
+    scenario took. When an iteration took longer than `interval`, the
+    next one starts right away and the pace starts over from there,
+    without trying to catch up.
+    """
+
+    def __init__(self, interval):
+        if interval <= 0:
+            raise ValueError("The interval needs to be positive")
+        self.interval = interval
+        self._next = None
+
+    async def wait(self):
+        now = perf_counter()
+        if self._next is None or now >= self._next:
+            self._next = now + self.interval
+            return
+        await cancellable_sleep(self._next - now)
+        self._next += self.interval
+
+
+class TokenBucket:
+    """Paces the iterations of all the workers of a process.
+
+    The bucket gets `rate` tokens per second, up to `capacity`, and each
+    iteration takes one. The workers share the rate, so the time a slow
+    worker doesn't use can be used by the others.
+    """
+
+    def __init__(self, rate, capacity):
+        if rate <= 0 or capacity < 1:
+            raise ValueError("The rate needs to be positive and the capacity at least 1")
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._last = perf_counter()
+
+    async def wait(self):
+        while not is_stopped():
+            now = perf_counter()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await cancellable_sleep((1 - self._tokens) / self.rate)
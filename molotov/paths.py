@@ -0,0 +1,47 @@
+import functools
+import re
+
+_NUMERIC = re.compile(r"^\d+$")
+_UUID = re.compile(r"^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$")
+
+
+class PathNormalizer:
+    """Replaces the variable parts of URL paths, to bound the number of labels.
+
+    `rules` is a list of (regex, template) pairs applied in order with
+    `re.sub`. When `auto` is True, numeric path segments are then replaced
+    by `{id}` and UUID segments by `{uuid}`, so `/users/1234` becomes
+    `/users/{id}`.
+
+    Results are kept in a LRU cache of `cache_size` paths.
+    """
+
+    def __init__(self, rules=(), auto=False, cache_size=4096):
+        self.rules = [(re.compile(pattern), template) for pattern, template in rules]
+        self.auto = auto
+        self.normalize = functools.lru_cache(maxsize=cache_size)(self._normalize)
+
+    def _normalize(self, path):
+        for pattern, template in self.rules:
+            path = pattern.sub(template, path)
+        if self.auto:
+            path = "/".join(_normalize_segment(segment) for segment in path.split("/"))
+        return path
+
+    def __call__(self, path):
+        return self.normalize(path)
+
+
+def _normalize_segment(segment):
+    if _NUMERIC.match(segment):
+        return "{id}"
+    if _UUID.match(segment):
+        return "{uuid}"
+    return segment
+
+
+def get_normalizer(args):
+    """Returns the normalizer configured by the options, or None."""
+    if not args.normalize_paths and not args.path_rule:
+        return None
+    return PathNormalizer(rules=args.path_rule or (), auto=args.normalize_paths)
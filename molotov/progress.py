@@ -0,0 +1,46 @@
+import json
+import sys
+
+FORMATS = ("json",)
+
+
+class JSONProgress:
+    """Writes the progress of a run, one JSON object per line.
+
+    Each line describes a timeline interval: the seconds elapsed at its
+    end, its throughput and latencies in seconds, and the totals of the
+    run so far. The stream is flushed after each line, so it can be
+    followed by another program. When `path` is None, lines go to stdout.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        if path is None:
+            self._file = sys.stdout
+        else:
+            self._file = open(path, "w")
+
+    def write(self, elapsed, stats, results):
+        line = {
+            "elapsed": round(elapsed, 3),
+            "rps": round(stats["rps"], 2),
+            "ok": results["OK"],
+            "failed": results["FAILED"],
+            "p50": stats["p50"],
+            "p99": stats["p99"],
+            "workers": results["WORKER"],
+            "processes": results["PROCESS"],
+        }
+        self._file.write(json.dumps(line, separators=(",", ":")) + "\n")
+        self._file.flush()
+
+    def close(self):
+        if self.path is not None:
+            self._file.close()
+
+
+def get_progress(args):
+    """Returns the progress reporter picked with --progress, or None."""
+    if args.progress is None:
+        return None
+    return JSONProgress(args.progress_output)
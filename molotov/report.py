@@ -0,0 +1,117 @@
+import csv
+import json
+import os
+import platform
+import socket
+from datetime import datetime, timezone
+
+from molotov import __version__
+from molotov.errors import FAILURE_CATEGORIES, HTTP_CLASSES
+
+# bump when the structure of the report changes
+SCHEMA_VERSION = 1
+FORMATS = (".json", ".csv")
+CSV_COLUMNS = ("kind", "name", "time", "count", "failed", "p50", "p90", "p99", "p999", "max")
+_ARG_TYPES = (str, int, float, bool, list, type(None))
+
+
+def get_format(path):
+    """Returns the report format given the file extension, or None."""
+    ext = os.path.splitext(path)[-1].lower()
+    return ext if ext in FORMATS else None
+
+
+def _args(args):
+    return {
+        key: value
+        for key, value in sorted(vars(args).items())
+        if not key.startswith("_") and isinstance(value, _ARG_TYPES)
+    }
+
+
+def _isoformat(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+
+def build_report(results, args, started, ended):
+    """Returns the results of a run, in a stable structure."""
+    duration = ended - started
+    completed = results["OK"] + results["FAILED"]
+    # the counters, the tables and the timeline have their own entries
+    totals = {
+        key: value
+        for key, value in results.items()
+        if key.isupper() and isinstance(value, (int, float))
+    }
+    return {
+        "schema": SCHEMA_VERSION,
+        "metadata": {
+            "version": __version__,
+            "python": platform.python_version(),
+            "host": socket.gethostname(),
+            "started": _isoformat(started),
+            "ended": _isoformat(ended),
+            "duration": duration,
+            "processes": args.processes,
+            "workers": args.workers,
+            "args": _args(args),
+        },
+        "totals": totals,
+        "throughput": completed / duration if duration > 0 else 0.0,
+        "scenarios": results["SCENARIOS"],
+        "corrected": results.get("CORRECTED", {}),
+        "requests": results["REQUESTS"],
+        "endpoints": results.get("ENDPOINTS", {}),
+        "errors": results["ERRORS"],
+        "origins": results.get("ORIGINS", {}),
+        "timeline": results.get("TIMELINE", []),
+        "autotune": results.get("AUTOTUNE", []),
+    }
+
+
+def _csv_rows(report):
+    totals = report["totals"]
+    yield {
+        "kind": "total",
+        "name": "",
+        "count": totals["OK"] + totals["FAILED"],
+        "failed": totals["FAILED"],
+    }
+    for name in FAILURE_CATEGORIES + HTTP_CLASSES:
+        if name in totals:
+            yield {"kind": "category", "name": name, "count": totals[name]}
+    for kind, key in (
+        ("scenario", "scenarios"),
+        ("corrected", "corrected"),
+        ("request", "requests"),
+        ("endpoint", "endpoints"),
+    ):
+        for name, latency in report[key].items():
+            row = {"kind": kind, "name": name}
+            row.update(latency)
+            yield row
+    for name, count in report["errors"].items():
+        yield {"kind": "error", "name": name, "count": count}
+    for name, count in report["origins"].items():
+        yield {"kind": "origin", "name": name, "count": count}
+    for row in report["timeline"]:
+        yield dict(row, kind="timeline")
+    for stage in report["autotune"]:
+        yield dict(stage, kind="autotune", name=stage["concurrency"])
+
+
+def write_report(path, report):
+    """Writes the report in the JSON or CSV format, given the path extension."""
+    fmt = get_format(path)
+    if fmt is None:
+        raise ValueError("Unsupported report format %r" % path)
+
+    with open(path, "w", newline="") as f:
+        if fmt == ".json":
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write("\n")
+        else:
+            writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS, extrasaction="ignore")
+            writer.writeheader()
+            for row in _csv_rows(report):
+                writer.writerow(row)
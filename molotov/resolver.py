@@ -0,0 +1,135 @@
+import asyncio
+import ipaddress
+import itertools
+import socket
+import time
+
+from aiohttp.abc import AbstractResolver
+from aiohttp.resolver import DefaultResolver
+
+# process-wide cache, as {(host, family): (expires, addresses)}. Entries
+# added before the processes are forked are inherited by all of them.
+_DNS_CACHE = {}
+# pending lookups, so concurrent connections to a host resolve it once
+_PENDING = {}
+# pinned addresses, as {host: addresses}
+_PINS = {}
+_ROUND_ROBIN = {}
+_CONFIG = {"enabled": False, "ttl": 10}
+
+
+def configure(ttl=10, pins=None):
+    """Activates the DNS cache. `pins` is a {host: [ip, ...]} mapping."""
+    _CONFIG["enabled"] = True
+    _CONFIG["ttl"] = ttl
+    _PINS.clear()
+    for host, ips in (pins or {}).items():
+        _PINS[host] = [_pinned_address(host, ip) for ip in ips]
+
+
+def reset():
+    """Deactivates the DNS cache and forgets everything."""
+    _CONFIG["enabled"] = False
+    _DNS_CACHE.clear()
+    _PENDING.clear()
+    _PINS.clear()
+    _ROUND_ROBIN.clear()
+
+
+def is_enabled():
+    return _CONFIG["enabled"]
+
+
+def parse_pin(value):
+    """Parses a HOST:IP[,IP...] value and returns (host, [ip, ...])."""
+    host, sep, ips = value.partition(":")
+    if not host or not sep or not ips:
+        raise ValueError("%r should be HOST:IP[,IP...]" % value)
+    ips = ips.split(",")
+    for ip in ips:
+        # raises a ValueError for invalid addresses
+        ipaddress.ip_address(ip)
+    return host, ips
+
+
+def _pinned_address(host, ip):
+    if ipaddress.ip_address(ip).version == 6:
+        family = socket.AF_INET6
+    else:
+        family = socket.AF_INET
+    return {
+        "hostname": host,
+        "host": ip,
+        "port": 0,
+        "family": family,
+        "proto": 0,
+        "flags": socket.AI_NUMERICHOST | socket.AI_NUMERICSERV,
+    }
+
+
+class CachingResolver(AbstractResolver):
+    """Resolver backed by the process-wide DNS cache.
+
+    Resolutions are kept `ttl` seconds, and pinned hosts are never
+    resolved. The addresses are rotated on every call, so consecutive
+    connections to a host are spread across all of its addresses.
+
+    Must be created from a running loop.
+    """
+
+    def __init__(self, resolver=None):
+        if resolver is None:
+            resolver = DefaultResolver()
+        self._resolver = resolver
+
+    async def resolve(self, host, port=0, family=socket.AF_INET):
+        addresses = _PINS.get(host)
+        if addresses is not None:
+            if family != socket.AF_UNSPEC:
+                addresses = [address for address in addresses if address["family"] == family]
+        else:
+            addresses = await self._lookup(host, family)
+        if not addresses:
+            raise OSError("Could not resolve %r" % host)
+        counter = _ROUND_ROBIN.get(host)
+        if counter is None:
+            counter = _ROUND_ROBIN[host] = itertools.count()
+        first = next(counter) % len(addresses)
+        return [dict(address, port=port) for address in addresses[first:] + addresses[:first]]
+
+    async def _lookup(self, host, family):
+        key = host, family
+        cached = _DNS_CACHE.get(key)
+        if cached is not None and cached[0] > time.monotonic():
+            return cached[1]
+
+        pending = _PENDING.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        pending = _PENDING[key] = asyncio.ensure_future(self._resolver.resolve(host, 0, family))
+        try:
+            addresses = await asyncio.shield(pending)
+        finally:
+            del _PENDING[key]
+        ttl = _CONFIG["ttl"]
+        if ttl > 0:
+            _DNS_CACHE[key] = time.monotonic() + ttl, addresses
+        return addresses
+
+    async def close(self):
+        await self._resolver.close()
+
+
+async def _warm(hosts):
+    resolver = CachingResolver()
+    try:
+        for host in hosts:
+            await resolver.resolve(host, family=socket.AF_UNSPEC)
+    finally:
+        await resolver.close()
+
+
+def warm(hosts, loop):
+    """Resolves `hosts` and puts them in the cache."""
+    loop.run_until_complete(_warm(hosts))
@@ -1,13 +1,20 @@
 import argparse
 import os
 import platform
+import re
 import sys
+import time
 from importlib import import_module
 from importlib.util import module_from_spec, spec_from_file_location
 
 from molotov import __version__
 from molotov.api import get_scenario, get_scenarios
+from molotov.errors import format_categories, format_errors
+from molotov.progress import FORMATS as PROGRESS_FORMATS
+from molotov.report import FORMATS, build_report, get_format, write_report
+from molotov.resolver import parse_pin
 from molotov.runner import Runner
+from molotov.shared.timeline import timeline_rows
 from molotov.ui.console import Console
 from molotov.util import OptionError, expand_options, printable_error
 
@@ -67,14 +74,142 @@ def _parser():
 
     parser.add_argument("-w", "--workers", help="Number of workers", type=int, default=1)
 
-    parser.add_argument("--ramp-up", help="Ramp-up time in seconds", type=float, default=0.0)
+    parser.add_argument(
+        "--ramp-up",
+        help="Ramp-up time in seconds. With --rate, only --arrival step ramps up the rate",
+        type=float,
+        default=0.0,
+    )
 
     parser.add_argument("--sizing", help="Autosizing", action="store_true", default=False)
 
     parser.add_argument("--sizing-tolerance", help="Sizing tolerance", type=float, default=5.0)
 
+    parser.add_argument(
+        "--sizing-latency",
+        help=(
+            "Autosizing that stops when the latency percentile of the scenarios "
+            "goes over this value, in milliseconds. Implies --sizing"
+        ),
+        type=float,
+        default=None,
+    )
+
+    parser.add_argument(
+        "--sizing-percentile",
+        help="Latency percentile checked by --sizing-latency",
+        choices=("p50", "p90", "p99", "p999"),
+        default="p99",
+    )
+
+    parser.add_argument(
+        "--autotune",
+        help=(
+            "Runs stages at increasing concurrency, starting at -w workers, "
+            "to find the knee of the throughput curve"
+        ),
+        action="store_true",
+        default=False,
+    )
+
+    parser.add_argument(
+        "--autotune-stage",
+        help="Duration in seconds of each --autotune stage",
+        type=float,
+        default=10.0,
+    )
+
+    parser.add_argument(
+        "--autotune-max-workers",
+        help="Maximum number of workers tried by --autotune",
+        type=int,
+        default=512,
+    )
+
+    parser.add_argument(
+        "--autotune-factor",
+        help="Factor applied to the number of workers between two --autotune stages",
+        type=float,
+        default=2.0,
+    )
+
+    parser.add_argument(
+        "--autotune-threshold",
+        help="Minimum throughput increase of an --autotune stage, 0.1 being 10%%",
+        type=float,
+        default=0.1,
+    )
+
+    parser.add_argument(
+        "--sizing-window",
+        help="Duration in seconds of the window checked by --sizing-latency",
+        type=float,
+        default=5.0,
+    )
+
     parser.add_argument("--delay", help="Delay between each worker run", type=float, default=0.0)
 
+    parser.add_argument(
+        "--rate",
+        help=(
+            "Number of scenarios started per second (open model). "
+            "The workers are the maximum number of concurrent scenarios"
+        ),
+        type=float,
+        default=None,
+    )
+
+    parser.add_argument(
+        "--arrival",
+        help="How scenarios are started with --rate",
+        choices=["constant", "poisson", "step"],
+        default="constant",
+    )
+
+    parser.add_argument(
+        "--rate-steps",
+        help="Number of steps used by --arrival step during the ramp-up",
+        type=int,
+        default=5,
+    )
+
+    parser.add_argument(
+        "--pace",
+        help=(
+            "Starts an iteration of each worker every PACE seconds, whatever "
+            "the time the scenario took"
+        ),
+        type=float,
+        default=None,
+    )
+
+    parser.add_argument(
+        "--pace-bucket",
+        help=(
+            "With --pace, the workers of a process share a token bucket "
+            "instead of being paced one by one"
+        ),
+        action="store_true",
+        default=False,
+    )
+
+    parser.add_argument(
+        "--co-correction",
+        help=(
+            "Also reports latencies corrected for coordinated omission, "
+            "using --co-interval, --pace or --delay as the expected interval"
+        ),
+        action="store_true",
+        default=False,
+    )
+
+    parser.add_argument(
+        "--co-interval",
+        help="Expected interval in seconds between two scenarios of a worker",
+        type=float,
+        default=None,
+    )
+
     parser.add_argument(
         "--console-update",
         help="Delay between each console update",
@@ -84,12 +219,29 @@ def _parser():
 
     parser.add_argument("-p", "--processes", help="Number of processes", type=int, default=1)
 
-    parser.add_argument("-d", "--duration", help="Duration in seconds", type=int, default=86400)
+    parser.add_argument("-d", "--duration", help="Duration in seconds", type=float, default=86400)
 
     parser.add_argument("-r", "--max-runs", help="Maximum runs per worker", type=int, default=None)
 
     parser.add_argument("-q", "--quiet", action="store_true", default=False, help="Quiet")
 
+    parser.add_argument(
+        "--progress",
+        help=(
+            "Replaces the console with one line of stats per timeline interval. "
+            "Use -q to only get those lines"
+        ),
+        choices=PROGRESS_FORMATS,
+        default=None,
+    )
+
+    parser.add_argument(
+        "--progress-output",
+        help="Writes the --progress lines in a file instead of stdout",
+        type=str,
+        default=None,
+    )
+
     parser.add_argument(
         "-x",
         "--exception",
@@ -106,6 +258,13 @@ def _parser():
         help="Number of failures required to fail",
     )
 
+    parser.add_argument(
+        "--max-tracebacks",
+        type=int,
+        default=5,
+        help="Number of tracebacks displayed per error origin",
+    )
+
     parser.add_argument(
         "-c",
         "--console",
@@ -123,6 +282,132 @@ def _parser():
         default="udp://localhost:8125",
     )
 
+    parser.add_argument(
+        "--timeline-interval",
+        help="Duration in seconds of each interval of the results timeline",
+        type=float,
+        default=1.0,
+    )
+
+    parser.add_argument(
+        "--timeline-size",
+        help="Maximum number of intervals kept in the results timeline",
+        type=int,
+        default=3600,
+    )
+
+    parser.add_argument(
+        "-o",
+        "--output",
+        help="Writes the results in a file. The format is picked with the extension: "
+        + ", ".join(FORMATS),
+        type=str,
+        default=None,
+    )
+
+    parser.add_argument(
+        "--samples",
+        help=(
+            "Streams every scenario and request sample to a CSV file. "
+            "With -p, each process writes its own file, numbered"
+        ),
+        type=str,
+        default=None,
+    )
+
+    parser.add_argument(
+        "--connector",
+        help=(
+            "worker: each worker has its own connection pool. "
+            "shared: all workers of a process share one connection pool"
+        ),
+        choices=("worker", "shared"),
+        default="worker",
+    )
+
+    parser.add_argument(
+        "--connector-limit",
+        help="Maximum number of connections of a shared connector. 0 means no limit",
+        type=int,
+        default=0,
+    )
+
+    parser.add_argument(
+        "--connector-limit-per-host",
+        help="Maximum number of connections per host of a shared connector. 0 means no limit",
+        type=int,
+        default=0,
+    )
+
+    parser.add_argument(
+        "--keepalive-timeout",
+        help="Seconds an idle connection is kept alive by a shared connector",
+        type=float,
+        default=15.0,
+    )
+
+    parser.add_argument(
+        "--dns-ttl",
+        help="Seconds a DNS resolution is cached by a shared connector or by --dns-cache",
+        type=int,
+        default=10,
+    )
+
+    parser.add_argument(
+        "--dns-cache",
+        help="Uses a DNS cache shared by all the workers of a process",
+        action="store_true",
+        default=False,
+    )
+
+    parser.add_argument(
+        "--dns-resolve",
+        help=(
+            "Pins a host to one or several IPs, round-robined across "
+            "connections. Implies --dns-cache. Can be repeated"
+        ),
+        metavar="HOST:IP[,IP...]",
+        action="append",
+        default=None,
+    )
+
+    parser.add_argument(
+        "--dns-warm",
+        help="Resolves a host when the test starts. Needs --dns-cache. Can be repeated",
+        metavar="HOST",
+        action="append",
+        default=None,
+    )
+
+    parser.add_argument(
+        "--normalize-paths",
+        help=(
+            "Replaces the numeric and UUID segments of the paths "
+            "in the request labels, like /users/{id}"
+        ),
+        action="store_true",
+        default=False,
+    )
+
+    parser.add_argument(
+        "--path-rule",
+        help=(
+            "Rewrites the paths in the request labels with a regular "
+            "expression, like '^/users/[^/]+' '/users/{name}'. Can be repeated"
+        ),
+        metavar=("REGEX", "TEMPLATE"),
+        nargs=2,
+        action="append",
+        default=None,
+    )
+
+    parser.add_argument(
+        "--endpoint-stats",
+        help="Displays and exports the latencies per method, path and status",
+        action="store_true",
+        default=False,
+    )
+
     parser.add_argument("--uvloop", help="Use uvloop", default=False, action="store_true")
 
     parser.add_argument(
@@ -181,6 +466,92 @@ def main(args=None):
 
         asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
 
+    if args.rate is not None and args.rate <= 0:
+        print("The --rate value needs to be positive")
+        sys.exit(0)
+
+    if args.sizing_latency is not None:
+        if args.sizing_latency <= 0 or args.sizing_window <= 0:
+            print("The --sizing-latency and --sizing-window values need to be positive")
+            sys.exit(0)
+        args.sizing = True
+
+    if args.autotune:
+        if args.sizing or args.rate or args.processes > 1:
+            print("You can't use --autotune with --sizing, --rate or -p")
+            sys.exit(0)
+        if args.autotune_max_workers < args.workers or args.autotune_factor <= 1:
+            print("--autotune needs --autotune-max-workers >= -w and --autotune-factor > 1")
+            sys.exit(0)
+        if args.autotune_stage < 2 * args.timeline_interval:
+            print("--autotune-stage needs to be at least twice --timeline-interval")
+            sys.exit(0)
+
+    if args.rate and args.sizing:
+        print("You can't use --rate and --sizing at the same time")
+        sys.exit(0)
+
+    if args.rate and args.ramp_up > 0 and args.arrival != "step":
+        print("You can't use --ramp-up with --rate, unless --arrival is step")
+        sys.exit(0)
+
+    if args.timeline_interval <= 0 or args.timeline_size <= 0:
+        print("The timeline interval and size need to be positive")
+        sys.exit(0)
+
+    if args.output and get_format(args.output) is None:
+        print("The --output file needs one of those extensions: %s" % ", ".join(FORMATS))
+        sys.exit(0)
+
+    if args.progress_output and not args.progress:
+        print("--progress-output needs --progress")
+        sys.exit(0)
+
+    if args.max_tracebacks < 0:
+        print("The --max-tracebacks value can't be negative")
+        sys.exit(0)
+
+    if args.connector_limit < 0 or args.connector_limit_per_host < 0:
+        print("The connector limits can't be negative")
+        sys.exit(0)
+
+    for value in args.dns_resolve or ():
+        try:
+            parse_pin(value)
+        except ValueError:
+            print("Invalid --dns-resolve value %r, it should be HOST:IP[,IP...]" % value)
+            sys.exit(0)
+
+    for pattern, _ in args.path_rule or ():
+        try:
+            re.compile(pattern)
+        except re.error as e:
+            print("Invalid --path-rule regular expression %r: %s" % (pattern, e))
+            sys.exit(0)
+
+    if args.dns_warm and not (args.dns_cache or args.dns_resolve):
+        print("--dns-warm needs --dns-cache")
+        sys.exit(0)
+
+    if args.pace is not None:
+        if args.pace <= 0:
+            print("The --pace value needs to be positive")
+            sys.exit(0)
+        if args.rate or args.delay > 0:
+            print("You can't use --pace with --rate or --delay")
+            sys.exit(0)
+    elif args.pace_bucket:
+        print("--pace-bucket needs --pace")
+        sys.exit(0)
+
+    if args.co_correction:
+        if args.rate:
+            print("You can't use --co-correction with --rate, latencies are already corrected")
+            sys.exit(0)
+        if not args.co_interval and not args.pace and args.delay <= 0:
+            print("--co-correction needs --co-interval, --pace or --delay")
+            sys.exit(0)
+
     if args.sizing:
         # sizing is just ramping up workers indefinitely until
         # something things break. If the user has not set the values,
@@ -204,6 +575,45 @@ OVERALL: SUCCESSES: %(OK)d | FAILURES: %(FAILED)d
 LAST MINUTE: SUCCESSES: %(MINUTE_OK)d | FAILURES: %(MINUTE_FAILED)d
 """
 
+_LATENCY_SIZING = """
+Sizing is over!
+
+%(PERCENTILE)s latency %(LATENCY).2fms obtained with %(MAX_WORKERS)d workers.
+
+Max sustainable throughput: %(THROUGHPUT).2f RPS (%(PERCENTILE)s below %(TARGET).2fms)
+
+OVERALL: SUCCESSES: %(OK)d | FAILURES: %(FAILED)d
+"""
+
+
+def format_autotune(stages, knee):
+    """Returns a table with the throughput and latencies of each --autotune stage."""
+    columns = ("rps", "p50", "p90", "p99")
+    lines = ["WORKERS" + "FAILED".rjust(11) + "".join(c.upper().rjust(11) for c in columns)]
+    for stage in stages:
+        line = str(stage["concurrency"]).ljust(7) + str(stage["failed"]).rjust(11)
+        line += ("%.2f" % stage["rps"]).rjust(11)
+        for column in columns[1:]:
+            line += ("%.2fms" % (stage[column] * 1000)).rjust(11)
+        if stage is knee:
+            line += "  <- knee"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def format_latencies(title, latencies):
+    """Returns a table with the latency percentiles, in milliseconds."""
+    width = max(len(title), *(len(name) for name in latencies))
+    columns = ("count", "p50", "p90", "p99", "p999", "max")
+    lines = [title.ljust(width) + "".join(column.upper().rjust(11) for column in columns)]
+    for name, latency in latencies.items():
+        line = name.ljust(width) + str(latency["count"]).rjust(11)
+        for column in columns[1:]:
+            line += ("%.2fms" % (latency[column] * 1000)).rjust(11)
+        lines.append(line)
+    return "\n".join(lines)
+
+
 HELLO = "**** Molotov v%s. Happy breaking! ****" % __version__
 
 
@@ -218,6 +628,8 @@ def run(args, stream=None):
 
     args.shared_console = Console(
         interval=args.console_update,
+        # with --progress, nothing is written in the console
+        max_lines_displayed=-1 if args.progress else 25,
         simple_console=args.console,
         single_process=args.processes == 1,
     )
@@ -279,28 +691,82 @@ def run(args, stream=None):
             direct_print(stream, "Can't find %r in registered scenarii" % args.single_mode)
             sys.exit(1)
 
-    res = Runner(args)()
+    runner = Runner(args)
+    started = time.time()
+    counter = time.perf_counter()
+    res = runner()
+    # the duration comes from the monotonic clock
+    ended = started + time.perf_counter() - counter
 
     def _dict(counters):
         res = {}
         for k, v in counters.items():
-            if k == "RATIO":
+            if k in ("RATIO", "THROUGHPUT"):
                 res[k] = float(v.value) / 100.0
+            elif k == "SLO_LATENCY":
+                res[k] = v.value / 1000000.0
             else:
                 res[k] = v.value
         return res
 
     res = _dict(res)
+    res["SCENARIOS"] = runner.histograms.percentiles("scenario")
+    failures = runner.histograms.counts("failure")
+    for name, latency in res["SCENARIOS"].items():
+        latency["failed"] = failures.get(name, 0)
+    res["REQUESTS"] = runner.histograms.percentiles("request")
+    res["ERRORS"] = runner.histograms.counts("error")
+    res["ORIGINS"] = runner.get_error_counts()
+    res["TIMELINE"] = timeline_rows(runner.get_timeline(), args.timeline_interval)
+    if args.co_correction:
+        res["CORRECTED"] = runner.histograms.percentiles("corrected")
+    if args.endpoint_stats:
+        res["ENDPOINTS"] = runner.histograms.percentiles("endpoint")
+    if runner.tuner is not None:
+        res["AUTOTUNE"] = runner.tuner.results()
+
+    if args.output:
+        write_report(args.output, build_report(res, args, started, ended))
 
     if not args.quiet:
         direct_print(stream, HELLO)
         if args.sizing:
-            if res["REACHED"] == 1:
+            if res["REACHED"] == 1 and res["SLO_LATENCY"] > 0:
+                sizing = dict(
+                    res,
+                    PERCENTILE=args.sizing_percentile.upper(),
+                    LATENCY=res["SLO_LATENCY"] * 1000,
+                    TARGET=args.sizing_latency,
+                )
+                direct_print(stream, _LATENCY_SIZING % sizing)
+            elif res["REACHED"] == 1:
                 direct_print(stream, _SIZING % res)
             else:
                 direct_print(stream, "Sizing was not finished. (interrupted)")
         else:
             direct_print(stream, "SUCCESSES: %(OK)d | FAILURES: %(FAILED)d\r" % res)
+            if args.rate:
+                direct_print(stream, "LATE STARTS: %(LATE)d | DROPPED STARTS: %(DROPPED)d" % res)
+
+        categories = format_categories(res)
+        if categories:
+            direct_print(stream, categories)
+
+        if args.autotune and res["AUTOTUNE"]:
+            knee = runner.tuner.knee
+            direct_print(stream, format_autotune(res["AUTOTUNE"], knee))
+            direct_print(stream, "Knee: %d workers, %.2f RPS" % (knee["concurrency"], knee["rps"]))
+
+        tables = [("SCENARIO", res["SCENARIOS"]), ("REQUEST", res["REQUESTS"])]
+        if args.co_correction:
+            tables.insert(1, ("SCENARIO (CORRECTED)", res["CORRECTED"]))
+        if args.endpoint_stats:
+            tables.append(("ENDPOINT", res["ENDPOINTS"]))
+        for title, latencies in tables:
+            if len(latencies) > 0:
+                direct_print(stream, format_latencies(title, latencies))
+        if res["ORIGINS"]:
+            direct_print(stream, format_errors(res["ORIGINS"]))
 
         direct_print(stream, "*** Bye ***")
         if args.fail is not None and res["FAILED"] >= args.fail:
@@ -1,14 +1,27 @@
 import asyncio
 import functools
 import os
+import queue
 import signal
+from time import perf_counter
 
 from multiprocess import Process  # type: ignore
+from multiprocess import Queue as MQueue  # type: ignore
 
+from molotov import resolver
 from molotov.api import get_fixture
+from molotov.errors import FAILURE_CATEGORIES, HTTP_CLASSES, top_errors
 from molotov.listeners import EventSender
-from molotov.shared import Counters, Tasks
+from molotov.pacing import Pacer, TokenBucket
+from molotov.paths import get_normalizer
+from molotov.progress import get_progress
+from molotov.samples import SampleWriter, samples_path
+from molotov.scheduler import Scheduler
+from molotov.session import get_connector
+from molotov.shared import Counters, Histograms, SlidingWindow, Tasks, Timeline, set_slot
+from molotov.shared.timeline import merge_timelines, window_summary
 from molotov.stats import get_statsd_client
+from molotov.tuner import Tuner
 from molotov.util import (
     cancellable_sleep,
     event_loop,
@@ -18,6 +31,11 @@ from molotov.util import (
 )
 from molotov.worker import Worker
 
+# minimum number of samples needed to check the latency target
+_SIZING_MIN_SAMPLES = 100
+# number of error origins displayed while running
+_TOP_ERRORS = 3
+
 
 class Runner:
     """Manages processes & workers and grabs results."""
@@ -45,8 +63,55 @@ class Runner:
             "SETUP_FAILED",
             "SESSION_SETUP_FAILED",
             "PROCESS",
+            "DROPPED",
+            "LATE",
+            "SLO_LATENCY",
+            "THROUGHPUT",
+            *FAILURE_CATEGORIES,
+            *HTTP_CLASSES,
+            # one slot for the main process and one per forked process
+            slots=args.processes + 1,
+            gauges=("REACHED", "RATIO", "MINUTE_OK", "MINUTE_FAILED", "SLO_LATENCY", "THROUGHPUT"),
+        )
+        # latency histograms and timeline. When -p is used, each process
+        # sends its own stats through _stats_queue while it runs
+        self.histograms = Histograms()
+        self.timeline = Timeline(
+            perf_counter(), interval=args.timeline_interval, size=args.timeline_size
         )
+        # error rate of the last minute for --sizing. Each process
+        # checks its own window
+        self.window = SlidingWindow(60)
+        # number of failures by error origin, sent along the stats with -p
+        self.origins = {}
+        self._stats_queue = None
+        self._process_histograms = {}
+        self._process_timelines = {}
+        self._process_origins = {}
+        self.scheduler = None
+        self.samples = None
+        # with --connector shared, the connector of the process
+        self.connector = None
+        self.normalizer = get_normalizer(args)
+        # with --pace-bucket, the token bucket of the process
+        self.bucket = None
+        # with --autotune, picks the number of workers of each stage
+        if args.autotune:
+            self.tuner = Tuner(
+                start=args.workers,
+                max_workers=args.autotune_max_workers,
+                factor=args.autotune_factor,
+                threshold=args.autotune_threshold,
+            )
+        else:
+            self.tuner = None
+        # with --progress, the reporter and the last interval reported
+        self.progress = None
+        self._reported = -1
         self.eventer = EventSender(self.console)
+        if args.dns_cache or args.dns_resolve:
+            pins = dict(resolver.parse_pin(value) for value in args.dns_resolve or ())
+            resolver.configure(ttl=args.dns_ttl, pins=pins)
 
     def _set_statsd(self):
         if self.args.statsd:
@@ -65,9 +130,22 @@ class Runner:
             except Exception as e:
                 self.console.print("The global_setup() fixture failed")
                 self.console.print_error(e)
+                resolver.reset()
                 raise
 
-        if not self.args.quiet:
+        if self.args.dns_warm and resolver.is_enabled():
+            # done before forking, so every process gets the cache
+            try:
+                resolver.warm(self.args.dns_warm, self.loop)
+            except OSError as e:
+                self.console.print("Could not pre-warm the DNS cache")
+                self.console.print_error(e)
+
+        if self.args.progress:
+            # replaces the console
+            self.progress = get_progress(self.args)
+            self._tasks.ensure_future(self._report_progress())
+        elif not self.args.quiet:
             self._tasks.ensure_future(self._display_results(self.args.console_update))
 
         self._tasks.ensure_future(self._send_workers_event(1))
@@ -83,6 +161,10 @@ class Runner:
                     print(e)
 
             self._shutdown()
+            if self.progress is not None:
+                self._finish_progress()
+            # the DNS cache is process-wide, it should not outlive the run
+            resolver.reset()
 
     def _launch_processes(self):
         args = self.args
@@ -91,13 +173,15 @@ class Runner:
             signal.SIGINT, functools.partial(os.kill, os.getpid(), signal.SIGTERM)
         )
         args.original_pid = os.getpid()
+        self.timeline.started = perf_counter()
 
         if args.processes > 1:
             if not args.quiet:
                 self.console.print("Forking %d processes" % args.processes)
+            self._stats_queue = MQueue()
             jobs = []
-            for _i in range(args.processes):
-                p = Process(target=self._process)
+            for i in range(args.processes):
+                p = Process(target=self._process, args=(i + 1,))
                 jobs.append(p)
                 p.start()
                 self._results["PROCESS"] += 1
@@ -105,8 +189,13 @@ class Runner:
             for job in jobs:
                 self._procs.append(job)
 
+            if args.sizing_latency:
+                # checked on the stats of all processes
+                self._tasks.ensure_future(self._size_latency())
+
             async def run(quiet, console):
                 while len(self._procs) > 0:
+                    self._collect_stats()
                     for job in jobs:
                         if job.exitcode is not None and job in self._procs:
                             self._procs.remove(job)
@@ -119,6 +208,10 @@ class Runner:
             finally:
                 stop()
                 self.loop.run_until_complete(self._tasks.cancel_all())
+                self._collect_stats()
+                self._stats_queue.close()
+                self._stats_queue.join_thread()
+                self._merge_stats()
         else:
             self._results["PROCESS"] = 1
             self._process()
@@ -133,27 +226,50 @@ class Runner:
         for proc in self._procs:
             proc.terminate()
 
+    def _create_worker(self, wid, delay=0):
+        return Worker(
+            wid,
+            self._results,
+            self.console,
+            self.args,
+            self.statsd,
+            delay,
+            self.loop,
+            self.histograms,
+            self.scheduler,
+            self.timeline,
+            self.samples,
+            self.connector,
+            self.normalizer,
+            self.window,
+            self._get_pacer(),
+            self.origins,
+        )
+
+    def _get_pacer(self):
+        args = self.args
+        if not args.pace:
+            return None
+        if not args.pace_bucket:
+            return Pacer(args.pace)
+        if self.bucket is None:
+            # the workers of the process share the same rate
+            self.bucket = TokenBucket(args.workers / args.pace, args.workers)
+        return self.bucket
+
     def create_workers(self):
         args = self.args
 
         def _prepare():
             tasks = []
             delay = 0
-            if args.ramp_up > 0.0:
+            # with --rate, the ramp-up is done by the scheduler
+            if args.ramp_up > 0.0 and self.scheduler is None:
                 step = args.ramp_up / args.workers
             else:
                 step = 0.0
             for i in range(self.args.workers):
-                worker = Worker(
-                    i,
-                    self._results,
-                    self.console,
-                    self.args,
-                    self.statsd,
-                    delay,
-                    self.loop,
-                )
-
+                worker = self._create_worker(i, delay)
                 tasks.append(asyncio.ensure_future(worker.run()))
                 delay += step
             return tasks
@@ -165,7 +281,44 @@ class Runner:
             msg = msg.format(args.workers, "s" if args.workers > 1 else "")
             return self.console.print_block(msg, _prepare)
 
-    def _process(self):
+    async def _autotune(self):
+        """Runs stages of --autotune-stage seconds at the concurrency picked by the tuner."""
+        args = self.args
+        timeline = self.timeline
+        workers = []
+        tasks = []
+        try:
+            while not is_stopped():
+                concurrency = self.tuner.next_concurrency()
+                if concurrency is None:
+                    break
+                for worker in workers[concurrency:]:
+                    worker.retire()
+                del workers[concurrency:]
+                while len(workers) < concurrency:
+                    worker = self._create_worker(len(tasks))
+                    workers.append(worker)
+                    tasks.append(asyncio.ensure_future(worker.run()))
+
+                started = perf_counter()
+                if not args.quiet:
+                    self.console.print("Running a stage with %d workers" % concurrency)
+                await cancellable_sleep(args.autotune_stage)
+                if is_stopped():
+                    break
+                # the first fifth of the stage is a warm-up
+                first = timeline.index(started + args.autotune_stage / 5) + 1
+                last = max(first, timeline.index(perf_counter()) - 1)
+                intervals = {index: timeline.get(index) for index in range(first, last + 1)}
+                stats = window_summary(intervals, first, last, timeline.interval)
+                self.tuner.add(concurrency, stats)
+        finally:
+            for worker in workers:
+                worker.retire()
+            await self.gather(*tasks)
+
+    def _process(self, slot=0):
+        set_slot(slot)
         set_timer()
 
         # coroutine that will kill everything when duration is up
@@ -199,8 +352,35 @@ class Runner:
         def _stop(*args):
             stop()
 
-        workers_tasks = self.create_workers()
-        gathered = self.gather(*workers_tasks)
+        if self._stats_queue is not None:
+            self._tasks.ensure_future(self._stats_sender())
+
+        if self.args.samples:
+            path = samples_path(self.args.samples, slot, self.args.processes)
+            self.samples = SampleWriter(path)
+
+        if self.args.rate:
+            self.scheduler = Scheduler(
+                self.args.rate / self.args.processes,
+                self._results,
+                self.args.workers,
+                arrival=self.args.arrival,
+                duration=self.args.duration,
+                ramp_up=self.args.ramp_up,
+                steps=self.args.rate_steps,
+            )
+            self._tasks.ensure_future(self.scheduler.run())
+
+        if self.args.connector == "shared":
+            self.connector = self.loop.run_until_complete(self._create_connector())
+
+        if self.args.sizing_latency and self.args.processes == 1:
+            self._tasks.ensure_future(self._size_latency())
+
+        if self.tuner is not None:
+            gathered = self.gather(self._autotune())
+        else:
+            gathered = self.gather(*self.create_workers())
         gathered.add_done_callback(_stop)
         try:
             self.loop.run_until_complete(gathered)
@@ -208,7 +388,138 @@ class Runner:
             if self.statsd is not None and not self.statsd.disconnected:
                 self.loop.run_until_complete(self._tasks.ensure_future(self.statsd.close()))
             self.loop.run_until_complete(self._tasks.cancel_all())
+            if self.connector is not None:
+                self.loop.run_until_complete(self.connector.close())
             self.loop.close()
+            if self.samples is not None:
+                self.samples.close()
+                if self.samples.dropped > 0:
+                    self.console.print("%d samples were dropped" % self.samples.dropped)
+            if self._stats_queue is not None:
+                self._send_stats()
+
+    async def _create_connector(self):
+        # the connector needs a running loop
+        args = self.args
+        return get_connector(
+            limit=args.connector_limit,
+            limit_per_host=args.connector_limit_per_host,
+            keepalive_timeout=args.keepalive_timeout,
+            dns_ttl=args.dns_ttl,
+        )
+
+    def _last_complete_index(self):
+        """Returns the index of the last interval with all its stats.
+
+        With -p, the processes send an interval once it's over, so it's
+        complete in the main process one interval later.
+        """
+        lag = 1 if self.args.processes == 1 else 2
+        return self.timeline.index(perf_counter()) - lag
+
+    async def _size_latency(self):
+        """Stops the test when the latency goes over the --sizing-latency target.
+
+        Runs in the main process.
+        """
+        while not is_stopped():
+            await cancellable_sleep(self.timeline.interval)
+            last = self._last_complete_index()
+            if last >= 0 and self.check_latency(last):
+                self._shutdown()
+                cancellable_sleep.cancel_all()
+                return
+
+    def check_latency(self, last):
+        """Checks the latency target on the --sizing-window seconds up to interval `last`.
+
+        Returns True when the target is reached, after setting REACHED and
+        SLO_LATENCY. Until then, the best throughput is kept in THROUGHPUT,
+        in hundredths. Only the main process writes those counters.
+        """
+        args = self.args
+        window = max(1, int(round(args.sizing_window / self.timeline.interval)))
+        stats = self.get_window_stats(max(0, last - window + 1), last)
+        if stats["count"] < _SIZING_MIN_SAMPLES:
+            return False
+        latency = stats[args.sizing_percentile]
+        if latency > args.sizing_latency / 1000.0:
+            self._results["SLO_LATENCY"].value = int(latency * 1000000)
+            self._results["REACHED"].value = 1
+            return True
+        throughput = int(stats["rps"] * 100)
+        if throughput > self._results["THROUGHPUT"].value:
+            self._results["THROUGHPUT"].value = throughput
+        return False
+
+    def _send_stats(self, since=0):
+        self._stats_queue.put(
+            (
+                os.getpid(),
+                self.histograms.snapshot(),
+                self.timeline.snapshot(since),
+                dict(self.origins),
+            )
+        )
+
+    async def _stats_sender(self):
+        sent = 0
+        while not is_stopped():
+            await cancellable_sleep(self.args.timeline_interval)
+            # intervals before the current one won't change anymore
+            current = self.timeline.index(perf_counter())
+            self._send_stats(since=sent)
+            sent = current
+
+    def _collect_stats(self):
+        while True:
+            try:
+                pid, histograms, timeline, origins = self._stats_queue.get_nowait()
+            except queue.Empty:
+                break
+            self._process_histograms[pid] = histograms
+            self._process_origins[pid] = origins
+            intervals = self._process_timelines.setdefault(pid, {})
+            intervals.update(timeline)
+            if len(intervals) > self.timeline.size:
+                for index in sorted(intervals)[: -self.timeline.size]:
+                    del intervals[index]
+
+    def _merge_stats(self):
+        for snapshot in self._process_histograms.values():
+            self.histograms.merge(Histograms.from_snapshot(snapshot))
+
+    def get_timeline(self):
+        """Returns the timeline of all processes, as {index: {name: entry}}."""
+        if self.args.processes == 1:
+            return self.timeline.snapshot()
+        return merge_timelines(self._process_timelines.values(), size=self.timeline.size)
+
+    def get_interval_stats(self, index):
+        """Returns the throughput and latencies of all processes for one interval."""
+        return self.get_window_stats(index, index)
+
+    def get_window_stats(self, first, last):
+        """Returns the throughput and latencies of all processes over several intervals."""
+        indexes = range(first, last + 1)
+        if self.args.processes == 1:
+            intervals = {index: self.timeline.get(index) for index in indexes}
+        else:
+            intervals = merge_timelines(
+                {index: timeline[index] for index in indexes if index in timeline}
+                for timeline in self._process_timelines.values()
+            )
+        return window_summary(intervals, first, last, self.timeline.interval)
+
+    def get_error_counts(self):
+        """Returns the number of failures of all processes, by error origin."""
+        if self.args.processes == 1:
+            return dict(sorted(self.origins.items()))
+        counts = {}
+        for origins in self._process_origins.values():
+            for origin, count in origins.items():
+                counts[origin] = counts.get(origin, 0) + count
+        return dict(sorted(counts.items()))
 
     async def _display_results(self, update_interval):
         if self.args.original_pid != os.getpid():
@@ -217,11 +528,44 @@ class Runner:
         await self.console.start()
 
         while not is_stopped():
-            self.console.print_results(self._results.to_dict())
+            results = self._results.to_dict()
+            index = self._last_complete_index()
+            if index >= 0:
+                stats = self.get_interval_stats(index)
+                results["RPS"] = stats["rps"]
+                results["P99"] = stats["p99"]
+            results["TOP_ERRORS"] = top_errors(self.get_error_counts(), _TOP_ERRORS)
+            self.console.print_results(results)
             await cancellable_sleep(update_interval)
 
         await self.console.stop()
 
+    async def _report_progress(self):
+        """Reports the stats of every complete interval with --progress."""
+        if self.args.original_pid != os.getpid():
+            raise OSError("Wrong process")
+
+        while not is_stopped():
+            await cancellable_sleep(self.timeline.interval)
+            self._write_progress(self._last_complete_index())
+
+    def _write_progress(self, last):
+        results = self._results.to_dict()
+        # intervals may be skipped when the loop is busy
+        for index in range(self._reported + 1, last + 1):
+            stats = self.get_interval_stats(index)
+            self.progress.write((index + 1) * self.timeline.interval, stats, results)
+        self._reported = max(self._reported, last)
+
+    def _finish_progress(self):
+        # once the run is over, all the stats are there, and the last
+        # line has the final totals
+        try:
+            self._write_progress(self.timeline.index(perf_counter()))
+        finally:
+            self.progress.close()
+            self.progress = None
+
     async def _send_workers_event(self, update_interval):
         while not self.eventer.stopped() and not is_stopped():
             workers = self._results["WORKER"].value
@@ -0,0 +1,87 @@
+import csv
+import os
+import queue
+import threading
+import time
+from time import perf_counter
+
+COLUMNS = ("timestamp", "kind", "name", "status", "latency", "worker", "process")
+
+
+def samples_path(path, slot, processes=1):
+    """Returns the file used by a process. With -p, each process gets its own file."""
+    if processes == 1:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{slot}{ext}"
+
+
+class SampleWriter:
+    """Streams every sample to a CSV file, from a background thread.
+
+    Samples are buffered in batches of `batch_size` and handed to a thread
+    that formats and writes them. At most `max_batches` batches wait for
+    the thread: when the disk can't keep up, batches are dropped rather
+    than blocking the event loop or growing the memory.
+    """
+
+    def __init__(self, path, batch_size=1000, max_batches=10):
+        self.path = path
+        self.batch_size = batch_size
+        self.dropped = 0
+        self._closed = False
+        self._batch = []
+        self._batches = queue.Queue(maxsize=max_batches)
+        # converts perf_counter() values to timestamps
+        self._offset = time.time() - perf_counter()
+        self._pid = os.getpid()
+        self._file = open(path, "w", newline="")
+        self._thread = threading.Thread(target=self._write, daemon=True)
+        self._thread.start()
+
+    def add(self, kind, name, status, end, latency, worker):
+        """Adds a sample. `end` is the perf_counter() value at the end of the call."""
+        batch = self._batch
+        batch.append((end, kind, name, status, latency, worker))
+        if len(batch) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        batch, self._batch = self._batch, []
+        try:
+            self._batches.put_nowait(batch)
+        except queue.Full:
+            self.dropped += len(batch)
+
+    def _write(self):
+        writer = csv.writer(self._file)
+        writer.writerow(COLUMNS)
+        offset, pid = self._offset, self._pid
+        while True:
+            batch = self._batches.get()
+            if batch is None:
+                break
+            writer.writerows(
+                (
+                    "%.6f" % (offset + end),
+                    kind,
+                    name,
+                    status,
+                    "%.6f" % latency,
+                    worker,
+                    pid,
+                )
+                for end, kind, name, status, latency, worker in batch
+            )
+        self._file.close()
+
+    def close(self):
+        """Writes the remaining samples and waits for the thread."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._batch:
+            self._flush()
+        # the sentinel always gets in, even if we need to wait
+        self._batches.put(None)
+        self._thread.join()
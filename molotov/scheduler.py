@@ -0,0 +1,108 @@
+import asyncio
+import random
+from time import perf_counter
+
+from molotov.util import is_stopped
+
+# maximum time the scheduler sleeps before checking if the test stopped
+_MAX_SLEEP = 0.1
+
+
+class Scheduler:
+    """Issues scenario starts at a target rate (open model).
+
+    Workers wait for the next start with :meth:`next_start`, which returns
+    the time the scenario was supposed to start, so latencies are measured
+    from that intended time.
+
+    When no worker is idle, the start is late and waits in a backlog of
+    at most `pool_size` starts. When the backlog is full, the start is
+    dropped.
+
+    Arrival modes:
+
+    - **constant**: one start every 1/rate seconds.
+    - **poisson**: exponentially distributed intervals, averaging 1/rate.
+    - **step**: the rate goes up in `steps` equal steps during `ramp_up`
+      seconds, then stays at `rate`.
+    """
+
+    def __init__(
+        self,
+        rate,
+        results,
+        pool_size,
+        arrival="constant",
+        duration=86400,
+        ramp_up=0.0,
+        steps=5,
+    ):
+        if rate <= 0:
+            raise ValueError("The rate needs to be positive")
+        self.rate = rate
+        self.results = results
+        self.pool_size = pool_size
+        self.arrival = arrival
+        self.duration = duration
+        self.steps = steps
+        self.step_duration = ramp_up / steps if steps > 0 else 0.0
+        self.started = None
+        self._starts = asyncio.Queue()
+        self._waiting = 0
+        self._closed = False
+
+    def current_rate(self, elapsed):
+        if self.arrival != "step" or self.step_duration <= 0:
+            return self.rate
+        step = min(self.steps, int(elapsed / self.step_duration) + 1)
+        return self.rate * step / self.steps
+
+    def _interval(self, elapsed):
+        rate = self.current_rate(elapsed)
+        if self.arrival == "poisson":
+            return random.expovariate(rate)
+        return 1.0 / rate
+
+    def _issue(self, intended_start):
+        backlog = self._starts.qsize()
+        if backlog >= self.pool_size:
+            self.results["DROPPED"] += 1
+            return
+        if backlog >= self._waiting:
+            # no idle worker
+            self.results["LATE"] += 1
+        self._starts.put_nowait(intended_start)
+
+    async def run(self):
+        self.started = next_start = perf_counter()
+        try:
+            while not is_stopped():
+                now = perf_counter()
+                elapsed = now - self.started
+                if elapsed > self.duration:
+                    break
+                if now < next_start:
+                    await asyncio.sleep(min(next_start - now, _MAX_SLEEP))
+                    continue
+                self._issue(next_start)
+                next_start += self._interval(next_start - self.started)
+        finally:
+            self.close()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        for _ in range(self.pool_size):
+            self._starts.put_nowait(None)
+
+    async def next_start(self):
+        """Waits for the next start and returns its intended time.
+
+        Returns None when the scheduler is done.
+        """
+        self._waiting += 1
+        try:
+            return await self._starts.get()
+        finally:
+            self._waiting -= 1
@@ -1,3 +1,4 @@
+import functools
 import socket
 from time import perf_counter
 from types import SimpleNamespace
@@ -5,10 +6,33 @@ from types import SimpleNamespace
 from aiohttp import TCPConnector, TraceConfig
 from aiohttp.client import ClientRequest, ClientResponse, ClientSession
 
+from molotov import resolver
 from molotov.api import create_session
+from molotov.errors import status_class
 from molotov.listeners import EventSender, StdoutListener
 
 _HOST = socket.gethostname()
+# maximum number of request labels kept in the caches
+_LABELS_CACHE_SIZE = 4096
+# maximum number of request and endpoint histograms of a process, the
+# other labels are counted together
+_MAX_LABELS = 1000
+
+
+@functools.lru_cache(maxsize=_LABELS_CACHE_SIZE)
+def _request_label(method, host, path):
+    return "%s %s%s" % (method, host, path)
+
+
+@functools.lru_cache(maxsize=_LABELS_CACHE_SIZE)
+def _endpoint_label(method, path, status):
+    return "%s %s %s" % (method, path, status)
+
+
+@functools.lru_cache(maxsize=_LABELS_CACHE_SIZE)
+def _statsd_labels(method, host, path, status):
+    label = "molotov.%s.%s.%s.%s" % (_HOST, method, host, path)
+    return label, "%s.%s" % (label, status)
 
 
 class LoggedClientResponse(ClientResponse):
@@ -16,11 +40,29 @@ class LoggedClientResponse(ClientResponse):
 
 
 class Context:
-    def __init__(self, statsd=None, args=None, worker_id=None, step=None):
+    def __init__(
+        self,
+        statsd=None,
+        args=None,
+        worker_id=None,
+        step=None,
+        histograms=None,
+        samples=None,
+        normalizer=None,
+        endpoints=False,
+        results=None,
+    ):
         self.statsd = statsd
         self.args = args
         self.worker_id = worker_id
         self.step = step
+        self.histograms = histograms
+        self.samples = samples
+        self.normalizer = normalizer
+        # when True, records per (method, path, status) histograms
+        self.endpoints = endpoints
+        # when set, counts the responses with an error status
+        self.results = results
 
 
 class SessionTracer(TraceConfig):
@@ -43,30 +85,38 @@ class SessionTracer(TraceConfig):
     def add_listener(self, listener):
         return self.eventer.add_listener(listener)
 
-    async def send_event(self, event, **options):
-        await self.eventer.send_event(event, session=self, **options)
+    def send_event(self, event, **options):
+        return self.eventer.send_event(event, session=self, **options)
 
     async def _request_start(self, session, trace_config_ctx, params):
-        if self.context.statsd:
-            prefix = "molotov.%(hostname)s.%(method)s.%(host)s.%(path)s"
-            data = {
-                "method": params.method,
-                "hostname": _HOST,
-                "host": params.url.host,
-                "path": params.url.path,
-            }
-            label = prefix % data
-            trace_config_ctx.start = perf_counter()
-            trace_config_ctx.label = label
-            trace_config_ctx.data = data
+        trace_config_ctx.start = perf_counter()
 
     async def _request_end(self, session, trace_config_ctx, params):
-        if self.context.statsd:
-            duration = int((perf_counter() - trace_config_ctx.start) * 1000)
-            self.context.statsd.timing(trace_config_ctx.label, value=duration)
-            self.context.statsd.increment(
-                trace_config_ctx.label + "." + str(params.response.status)
-            )
+        end = perf_counter()
+        elapsed = end - trace_config_ctx.start
+        context = self.context
+        url = params.url
+        path = url.path
+        if context.normalizer is not None:
+            path = context.normalizer(path)
+        status = params.response.status
+        if context.results is not None and status >= 400:
+            counter = status_class(status)
+            if counter in context.results:
+                context.results[counter] += 1
+        if context.histograms is not None or context.samples is not None:
+            label = _request_label(params.method, url.host, path)
+            if context.histograms is not None:
+                context.histograms.bounded("request", label, _MAX_LABELS).record(elapsed)
+                if context.endpoints:
+                    endpoint = _endpoint_label(params.method, path, status)
+                    context.histograms.bounded("endpoint", endpoint, _MAX_LABELS).record(elapsed)
+            if context.samples is not None:
+                context.samples.add("request", label, status, end, elapsed, context.worker_id)
+        if context.statsd:
+            label, status_label = _statsd_labels(params.method, url.host, path, status)
+            context.statsd.timing(label, value=int(elapsed * 1000))
+            context.statsd.increment(status_label)
         await self.send_event(
             "response_received",
             response=params.response,
@@ -89,6 +139,28 @@ class LoggedClientRequest(ClientRequest):
         return response
 
 
+def get_connector(limit=0, limit_per_host=0, keepalive_timeout=15.0, dns_ttl=10):
+    """Returns a connector that can be shared by the sessions of a process.
+
+    Must be called from a running loop. A `limit` or `limit_per_host` of 0
+    means no limit.
+    """
+    if resolver.is_enabled():
+        return TCPConnector(
+            limit=limit,
+            limit_per_host=limit_per_host,
+            keepalive_timeout=keepalive_timeout,
+            use_dns_cache=False,
+            resolver=resolver.CachingResolver(),
+        )
+    return TCPConnector(
+        limit=limit,
+        limit_per_host=limit_per_host,
+        keepalive_timeout=keepalive_timeout,
+        ttl_dns_cache=dns_ttl,
+    )
+
+
 def get_session(loop, console, verbose=0, statsd=None, kind="http", **kw):
     trace_config = SessionTracer(loop, console, verbose, statsd)
 
@@ -97,7 +169,15 @@ def get_session(loop, console, verbose=0, statsd=None, kind="http", **kw):
 
     connector = kw.pop("connector", None)
     if connector is None:
-        connector = TCPConnector(limit=None, ttl_dns_cache=None)  # type: ignore
+        if resolver.is_enabled():
+            # the process-wide cache replaces the connector one
+            connector = TCPConnector(
+                limit=None,  # type: ignore
+                use_dns_cache=False,
+                resolver=resolver.CachingResolver(),
+            )
+        else:
+            connector = TCPConnector(limit=None, ttl_dns_cache=None)  # type: ignore
 
     request_class = LoggedClientRequest
     request_class.verbose = verbose
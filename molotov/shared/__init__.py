@@ -1,4 +1,19 @@
-from .counter import Counter, Counters
+from .counter import Counter, Counters, SlottedCounter, set_slot
+from .histogram import Histogram, Histograms
+from .ring import RingBuffer
 from .tasks import Tasks
+from .timeline import Timeline
+from .window import SlidingWindow
 
-__all__ = ["Counter", "Counters", "Tasks"]
+__all__ = [
+    "Counter",
+    "Counters",
+    "Histogram",
+    "Histograms",
+    "RingBuffer",
+    "SlidingWindow",
+    "SlottedCounter",
+    "Tasks",
+    "Timeline",
+    "set_slot",
+]
@@ -1,5 +1,14 @@
 import multiprocess
 
+# slot used by SlottedCounter in the current process
+_SLOT = 0
+
+
+def set_slot(slot):
+    """Sets the slot the current process writes to in SlottedCounter."""
+    global _SLOT
+    _SLOT = slot
+
 
 class Counter:
     """A multi-process compatible counter."""
@@ -31,14 +40,15 @@ class Counter:
             other = other.value
         if not isinstance(other, int):
             raise TypeError(other)
-        if self._val.value == other:
+        value = self.value
+        if value == other:
             return 0
-        elif self._val.value > other:
+        elif value > other:
             return 1
         return -1
 
     def __repr__(self):
-        return "<Counter %d>" % self._val.value
+        return "<Counter %d>" % self.value
 
     def __iadd__(self, other):
         self.__add__(other)
@@ -73,13 +83,59 @@ class Counter:
             self._val.value = _value
 
 
+class SlottedCounter(Counter):
+    """A multi-process compatible counter that does not lock.
+
+    Each process adds to its own slot of a shared memory array,
+    see :func:`set_slot`, and the value is the sum of all slots.
+
+    Setting the value reads the other slots, so two processes setting it
+    at the same time both apply their change: use a :class:`Counter` for
+    values that are set rather than added.
+    """
+
+    def __init__(self, name, slots):
+        self._slots = multiprocess.RawArray("q", slots)  # type: ignore
+        self._name = name
+
+    def __add__(self, other):
+        if isinstance(other, Counter):
+            other = other.value
+        if not isinstance(other, int):
+            raise NotImplementedError()
+        self._slots[_SLOT] += other
+
+    @property
+    def value(self):
+        return sum(self._slots)
+
+    @value.setter
+    def value(self, _value):
+        if isinstance(_value, Counter):
+            _value = _value.value
+        if not isinstance(_value, int):
+            raise TypeError(_value)
+        # we only write in our own slot, so the other processes
+        # can keep on adding to theirs
+        self._slots[_SLOT] += _value - sum(self._slots)
+
+
 class Counters:
-    """Mapping of Counter items."""
+    """Mapping of Counter items.
+
+    When `slots` is provided, the counters are :class:`SlottedCounter`
+    instances with that many slots, one per process, except the `gauges`
+    keys: their value is set rather than added, so they stay a locked
+    :class:`Counter`.
+    """
 
-    def __init__(self, *keys):
+    def __init__(self, *keys, slots=None, gauges=()):
         self._counters = {}
         for key in keys:
-            self._counters[key] = Counter(key)
+            if slots is None or key in gauges:
+                self._counters[key] = Counter(key)
+            else:
+                self._counters[key] = SlottedCounter(key, slots)
 
     def to_dict(self):
         return {key: value.value for key, value in self._counters.items()}
@@ -105,7 +161,11 @@ class Counters:
     def __setitem__(self, key, value):
         if key not in self._counters:
             raise KeyError(key)
-        self._counters[key].value = value
+        counter = self._counters[key]
+        # counters["key"] += 1 sets back the counter itself
+        if value is counter:
+            return
+        counter.value = value
 
     def __getitem__(self, key):
         return self._counters[key]
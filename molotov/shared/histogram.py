@@ -0,0 +1,209 @@
+import math
+
+# values are stored in microseconds. Below _SUB_BUCKETS every value
+# gets its own bucket, then each power of two is split in _HALF
+# linear buckets, which gives a ~3% relative precision.
+_SUB_BITS = 6
+_SUB_BUCKETS = 1 << _SUB_BITS
+_HALF_BITS = _SUB_BITS - 1
+_HALF = 1 << _HALF_BITS
+_MAX_VALUE = (1 << 40) - 1  # ~12 days
+_BUCKETS = ((_MAX_VALUE.bit_length() - _SUB_BITS) << _HALF_BITS) + _SUB_BUCKETS
+
+PERCENTILES = (("p50", 50.0), ("p90", 90.0), ("p99", 99.0), ("p999", 99.9))
+# name of the histogram shared by the names over the limit of their kind
+OTHERS = "(others)"
+
+
+def _bucket(value):
+    if value < _SUB_BUCKETS:
+        return value if value > 0 else 0
+    if value > _MAX_VALUE:
+        value = _MAX_VALUE
+    shift = value.bit_length() - _SUB_BITS
+    return (shift << _HALF_BITS) + (value >> shift)
+
+
+def _highest_value(index):
+    if index < _SUB_BUCKETS:
+        return index
+    shift = (index >> _HALF_BITS) - 1
+    lowest = (index - (shift << _HALF_BITS)) << shift
+    return lowest + (1 << shift) - 1
+
+
+class Histogram:
+    """A fixed-memory log-bucketed latency histogram.
+
+    Values are recorded in seconds. Recording is O(1) and does
+    not allocate any container.
+    """
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * _BUCKETS
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, seconds, count=1):
+        value = int(seconds * 1000000)
+        self.counts[_bucket(value)] += count
+        self.count += count
+        self.total += value * count
+        if value > self.max:
+            self.max = value
+
+    def record_corrected(self, seconds, interval):
+        """Records a value and back-fills the samples a stall prevented.
+
+        Like HdrHistogram's recordValueWithExpectedInterval: when the value
+        is larger than the expected `interval` between two samples, the
+        missing samples are recorded with linearly decreasing values.
+        """
+        self.record(seconds)
+        if interval <= 0:
+            return
+        missing = seconds - interval
+        while missing >= interval:
+            self.record(missing)
+            missing -= interval
+
+    def merge(self, other):
+        counts = self.counts
+        for index, count in enumerate(other.counts):
+            if count:
+                counts[index] += count
+        self.count += other.count
+        self.total += other.total
+        if other.max > self.max:
+            self.max = other.max
+
+    def percentile(self, percent):
+        """Returns the value in seconds below which `percent` % of the samples fall."""
+        if self.count == 0:
+            return 0.0
+        wanted = max(1, int(math.ceil(self.count * percent / 100.0)))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= wanted:
+                return min(_highest_value(index), self.max) / 1000000.0
+        return self.max / 1000000.0
+
+    def mean(self):
+        if self.count == 0:
+            return 0.0
+        return self.total / self.count / 1000000.0
+
+    def percentiles(self):
+        res = {"count": self.count}
+        for name, percent in PERCENTILES:
+            res[name] = self.percentile(percent)
+        res["max"] = self.max / 1000000.0
+        return res
+
+    def snapshot(self):
+        """Returns a compact, picklable copy of the histogram."""
+        counts = {index: count for index, count in enumerate(self.counts) if count}
+        return counts, self.count, self.total, self.max
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        counts, count, total, max_ = snapshot
+        histogram = cls()
+        for index, value in counts.items():
+            histogram.counts[index] = value
+        histogram.count = count
+        histogram.total = total
+        histogram.max = max_
+        return histogram
+
+    def __repr__(self):
+        return "<Histogram count=%d max=%d>" % (self.count, self.max)
+
+
+class Histograms:
+    """Mapping of Histogram items, created on first access.
+
+    Keys are `(kind, name)` tuples, like `("scenario", "my_scenario")`.
+    """
+
+    def __init__(self):
+        self._histograms = {}
+        # number of names of each kind
+        self._names = {}
+
+    def __getitem__(self, key):
+        try:
+            return self._histograms[key]
+        except KeyError:
+            histogram = self._histograms[key] = Histogram()
+            self._names[key[0]] = self._names.get(key[0], 0) + 1
+            return histogram
+
+    def bounded(self, kind, name, limit):
+        """Returns the histogram of `(kind, name)`.
+
+        Once `limit` names of that kind are used, new names share the
+        histogram of `(kind, OTHERS)`, so names built from URLs don't
+        grow the memory without bound.
+        """
+        histogram = self._histograms.get((kind, name))
+        if histogram is not None:
+            return histogram
+        if self._names.get(kind, 0) >= limit:
+            return self[kind, OTHERS]
+        return self[kind, name]
+
+    def __contains__(self, key):
+        return key in self._histograms
+
+    def __iter__(self):
+        return iter(self._histograms)
+
+    def __len__(self):
+        return len(self._histograms)
+
+    def items(self):
+        return self._histograms.items()
+
+    def keys(self):
+        return self._histograms.keys()
+
+    def clear(self):
+        self._histograms.clear()
+        self._names.clear()
+
+    def merge(self, other):
+        for key, histogram in other.items():
+            self[key].merge(histogram)
+
+    def snapshot(self):
+        return {key: histogram.snapshot() for key, histogram in self._histograms.items()}
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        histograms = cls()
+        for key, data in snapshot.items():
+            histograms._histograms[key] = Histogram.from_snapshot(data)
+            histograms._names[key[0]] = histograms._names.get(key[0], 0) + 1
+        return histograms
+
+    def counts(self, kind):
+        """Returns the number of samples of all `(kind, name)` keys, by name."""
+        return {
+            key[1]: histogram.count for key, histogram in sorted(self.items()) if key[0] == kind
+        }
+
+    def percentiles(self, kind):
+        """Returns the percentiles of all `(kind, name)` keys, by name."""
+        return {
+            key[1]: histogram.percentiles()
+            for key, histogram in sorted(self.items())
+            if key[0] == kind
+        }
+
+    def __repr__(self):
+        return repr(self._histograms)
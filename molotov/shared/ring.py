@@ -0,0 +1,70 @@
+import multiprocess
+
+
+class RingBuffer:
+    """A fixed-size buffer of text lines in shared memory.
+
+    Processes forked after its creation can append lines without any
+    round trip to a server process: a line is copied in a slot of
+    `line_size` bytes under a lock. Longer lines are rejected, since
+    truncating them could cut a character or some markup.
+    Once `capacity` lines are written, the oldest ones are overwritten.
+
+    Lines are read back with :meth:`lines`, or consumed with :meth:`pop`.
+    """
+
+    def __init__(self, capacity, line_size=1280):
+        self.capacity = capacity
+        self.line_size = line_size
+        self._data = multiprocess.RawArray("c", capacity * line_size)  # type: ignore
+        self._sizes = multiprocess.RawArray("i", capacity)  # type: ignore
+        # number of lines written and consumed since the creation
+        self._written = multiprocess.RawValue("q", 0)  # type: ignore
+        self._read = multiprocess.RawValue("q", 0)  # type: ignore
+        self._lock = multiprocess.Lock()  # type: ignore
+
+    def append(self, line):
+        data = line.encode("utf8")
+        if len(data) > self.line_size:
+            raise ValueError("Line longer than %d bytes" % self.line_size)
+        with self._lock:
+            slot = self._written.value % self.capacity
+            start = slot * self.line_size
+            self._data[start : start + len(data)] = data
+            self._sizes[slot] = len(data)
+            self._written.value += 1
+
+    def _first(self):
+        return max(self._read.value, self._written.value - self.capacity)
+
+    def _get(self, index):
+        slot = index % self.capacity
+        start = slot * self.line_size
+        return self._data[start : start + self._sizes[slot]].decode("utf8")
+
+    def lines(self):
+        """Returns the lines that were not consumed, oldest first."""
+        with self._lock:
+            return [self._get(index) for index in range(self._first(), self._written.value)]
+
+    def pop(self, max_lines):
+        """Consumes and returns at most `max_lines` lines, oldest first."""
+        with self._lock:
+            first = self._first()
+            last = min(self._written.value, first + max_lines)
+            lines = [self._get(index) for index in range(first, last)]
+            self._read.value = last
+        return lines
+
+    @property
+    def version(self):
+        """Changes every time lines are appended or consumed."""
+        return self._written.value + self._read.value
+
+    def clear(self):
+        with self._lock:
+            self._read.value = self._written.value
+
+    def __len__(self):
+        with self._lock:
+            return self._written.value - self._first()
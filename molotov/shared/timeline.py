@@ -0,0 +1,135 @@
+from molotov.shared.histogram import Histogram, _bucket
+
+
+class _Entry:
+    """Completions, failures and sparse latency buckets of one interval."""
+
+    __slots__ = ("counts", "count", "failed", "total", "max")
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.failed = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, seconds, failed):
+        value = int(seconds * 1000000)
+        index = _bucket(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        if failed:
+            self.failed += 1
+        if value > self.max:
+            self.max = value
+
+    def snapshot(self):
+        return dict(self.counts), self.count, self.failed, self.total, self.max
+
+
+def _merge_entries(one, two):
+    counts = dict(one[0])
+    for index, count in two[0].items():
+        counts[index] = counts.get(index, 0) + count
+    return counts, one[1] + two[1], one[2] + two[2], one[3] + two[3], max(one[4], two[4])
+
+
+class Timeline:
+    """Ring buffer of per-interval stats, per scenario.
+
+    Each interval of `interval` seconds since `started` (a perf_counter()
+    value) gets a bucket with the completions, failures and latencies of
+    every scenario. Only the last `size` intervals are kept.
+    """
+
+    def __init__(self, started, interval=1.0, size=3600):
+        self.started = started
+        self.interval = interval
+        self.size = size
+        # each slot is [interval index, {name: _Entry}]
+        self._slots = [[-1, None] for _ in range(size)]
+
+    def index(self, now):
+        return int((now - self.started) / self.interval)
+
+    def record(self, name, now, seconds, failed=False):
+        index = self.index(now)
+        slot = self._slots[index % self.size]
+        if slot[0] != index:
+            slot[0] = index
+            slot[1] = {}
+        entries = slot[1]
+        entry = entries.get(name)
+        if entry is None:
+            entry = entries[name] = _Entry()
+        entry.record(seconds, failed)
+
+    def get(self, index):
+        """Returns the entries of one interval, as {name: entry}."""
+        slot_index, entries = self._slots[index % self.size]
+        if slot_index != index or entries is None:
+            return {}
+        return {name: entry.snapshot() for name, entry in entries.items()}
+
+    def snapshot(self, since=0):
+        """Returns the intervals from `since`, as {index: {name: entry}}."""
+        return {
+            index: {name: entry.snapshot() for name, entry in entries.items()}
+            for index, entries in self._slots
+            if entries is not None and index >= since
+        }
+
+
+def merge_timelines(snapshots, size=None):
+    """Sums timeline snapshots. When `size` is provided, only keeps the last intervals."""
+    merged = {}
+    for snapshot in snapshots:
+        for index, entries in snapshot.items():
+            target = merged.setdefault(index, {})
+            for name, entry in entries.items():
+                if name in target:
+                    target[name] = _merge_entries(target[name], entry)
+                else:
+                    target[name] = entry
+    if size is not None and len(merged) > size:
+        for index in sorted(merged)[:-size]:
+            del merged[index]
+    return merged
+
+
+def timeline_rows(snapshot, interval):
+    """Returns the timeline as a list of rows, sorted by time then scenario.
+
+    Each row has the start time of the interval (in seconds since the
+    beginning of the test), the scenario name, the number of completed and
+    failed runs, the throughput, and the latency percentiles.
+    """
+    rows = []
+    for index in sorted(snapshot):
+        for name, (counts, count, failed, total, max_) in sorted(snapshot[index].items()):
+            histogram = Histogram.from_snapshot((counts, count, total, max_))
+            row = {"time": index * interval, "name": name, "failed": failed}
+            row.update(histogram.percentiles())
+            row["rps"] = count / interval
+            rows.append(row)
+    return rows
+
+
+def interval_summary(snapshot, index, interval):
+    """Returns the throughput and latency percentiles of an interval, for all scenarios."""
+    return window_summary(snapshot, index, index, interval)
+
+
+def window_summary(snapshot, first, last, interval):
+    """Returns the throughput and latency percentiles from interval `first` to `last`."""
+    histogram = Histogram()
+    failed = 0
+    for index in range(first, last + 1):
+        for counts, count, entry_failed, total, max_ in snapshot.get(index, {}).values():
+            histogram.merge(Histogram.from_snapshot((counts, count, total, max_)))
+            failed += entry_failed
+    summary = histogram.percentiles()
+    summary["failed"] = failed
+    summary["rps"] = histogram.count / ((last - first + 1) * interval)
+    return summary
@@ -0,0 +1,59 @@
+from time import perf_counter
+
+
+class SlidingWindow:
+    """Successes and failures of the last `size` seconds.
+
+    Results are counted in a ring of one-second buckets. Buckets that get
+    out of the window are subtracted from the totals, so adding a result
+    and reading the totals are O(1), and the window moves smoothly
+    instead of being reset.
+    """
+
+    __slots__ = ("size", "ok", "failed", "_ok", "_failed", "_second", "_clock")
+
+    def __init__(self, size=60, clock=perf_counter):
+        self.size = size
+        self.ok = 0
+        self.failed = 0
+        self._ok = [0] * size
+        self._failed = [0] * size
+        self._second = None
+        self._clock = clock
+
+    def _advance(self, second):
+        if self._second is None:
+            self._second = second
+            return
+        if second <= self._second:
+            return
+        # empties the buckets of the seconds that went by
+        for past in range(max(self._second + 1, second - self.size + 1), second + 1):
+            index = past % self.size
+            self.ok -= self._ok[index]
+            self.failed -= self._failed[index]
+            self._ok[index] = self._failed[index] = 0
+        self._second = second
+
+    def add(self, ok=True, now=None):
+        second = int(self._clock() if now is None else now)
+        self._advance(second)
+        index = second % self.size
+        if ok:
+            self._ok[index] += 1
+            self.ok += 1
+        else:
+            self._failed[index] += 1
+            self.failed += 1
+
+    def totals(self, now=None):
+        """Returns the successes and failures of the window, as (ok, failed)."""
+        self._advance(int(self._clock() if now is None else now))
+        return self.ok, self.failed
+
+    def ratio(self, now=None):
+        """Returns the percentage of failures compared to successes."""
+        ok, failed = self.totals(now)
+        if failed == 0:
+            return 0.0
+        return float(failed) / float(max(ok, 1)) * 100.0
@@ -18,8 +18,9 @@ import pytest
 from aiohttp.client_reqrep import URL
 from multidict import CIMultiDict
 
-from molotov import util
-from molotov.api import _FIXTURES, _SCENARIO
+from molotov import resolver, util
+from molotov.api import _FIXTURES, _SCENARIO, _reset_pick_table
+from molotov.errors import FAILURE_CATEGORIES, HTTP_CLASSES
 from molotov.run import PYPY
 from molotov.session import LoggedClientRequest, LoggedClientResponse
 from molotov.shared.counter import Counters
@@ -196,10 +197,13 @@ class TestLoop(unittest.TestCase):
         self.policy = asyncio.get_event_loop_policy()
         _SCENARIO.clear()
         _FIXTURES.clear()
+        _reset_pick_table()
 
     def tearDown(self):
         _SCENARIO.clear()
         _FIXTURES.clear()
+        _reset_pick_table()
+        resolver.reset()
         _FIXTURES.update(self.oldsetup)
         asyncio.set_event_loop_policy(self.policy)
 
@@ -220,11 +224,44 @@ class TestLoop(unittest.TestCase):
         args.single_run = False
         args.max_runs = None
         args.delay = 0.0
+        args.rate = None
+        args.arrival = "constant"
+        args.rate_steps = 5
+        args.co_correction = False
+        args.co_interval = None
+        args.output = None
+        args.timeline_interval = 1.0
+        args.timeline_size = 3600
+        args.samples = None
+        args.connector = "worker"
+        args.connector_limit = 0
+        args.connector_limit_per_host = 0
+        args.keepalive_timeout = 15.0
+        args.dns_ttl = 10
+        args.dns_cache = False
+        args.dns_resolve = None
+        args.dns_warm = None
+        args.normalize_paths = False
+        args.path_rule = None
+        args.endpoint_stats = False
+        args.sizing_latency = None
+        args.sizing_percentile = "p99"
+        args.sizing_window = 5.0
+        args.pace = None
+        args.pace_bucket = False
+        args.autotune = False
+        args.autotune_stage = 10.0
+        args.autotune_max_workers = 512
+        args.autotune_factor = 2.0
+        args.autotune_threshold = 0.1
         args.sizing = False
         args.sizing_tolerance = 0.0
         args.console_update = 0
         args.use_extension = []
         args.fail = None
+        args.max_tracebacks = 5
+        args.progress = None
+        args.progress_output = None
         args.force_reconnection = False
         args.disable_dns_resolve = False
 
@@ -253,6 +290,8 @@ def async_test(func):
             "MAX_WORKERS",
             "SETUP_FAILED",
             "SESSION_SETUP_FAILED",
+            *FAILURE_CATEGORIES,
+            *HTTP_CLASSES,
         )
         kw["loop"] = loop
         kw["console"] = console
@@ -1,4 +1,4 @@
-from molotov.api import get_scenarios, pick_scenario, scenario, setup
+from molotov.api import get_scenario, get_scenarios, pick_scenario, scenario, setup
 from molotov.tests.support import TestLoop, async_test
 
 
@@ -16,6 +16,23 @@ class TestUtil(TestLoop):
         ones = len([f for f in picked if f == "_one"])
         self.assertTrue(ones < 20)
 
+    def test_pick_scenario_new_registration(self):
+        @scenario(weight=10)
+        async def _one(self):
+            pass
+
+        self.assertEqual(pick_scenario()["name"], "_one")
+
+        # registering a scenario resets the picking table
+        @scenario(weight=10**9)
+        async def _two(self):
+            pass
+
+        self.assertEqual(pick_scenario()["name"], "_two")
+
+    def test_pick_no_scenario(self):
+        self.assertIsNone(pick_scenario())
+
     @async_test
     async def test_can_call(self, loop, console, results):
         @setup()
@@ -95,3 +112,19 @@ class TestUtil(TestLoop):
         except ValueError:
             return
         raise AssertionError("Should raise")
+
+    def test_session_kind(self):
+        @scenario()
+        async def _http(session):
+            pass
+
+        @scenario()
+        async def _grpc(session, session_factory="grpc", grpc_url="ipv4:///127.0.0.1:1"):
+            pass
+
+        self.assertEqual(get_scenario("_http")["session_kind"], "http")
+        self.assertEqual(get_scenario("_http")["session_options"], {})
+        self.assertEqual(get_scenario("_grpc")["session_kind"], "grpc")
+        self.assertEqual(
+            get_scenario("_grpc")["session_options"], {"grpc_url": "ipv4:///127.0.0.1:1"}
+        )
@@ -0,0 +1,70 @@
+import asyncio
+import unittest
+
+from aiohttp import ClientConnectorError, ServerDisconnectedError, ServerTimeoutError
+
+from molotov.errors import (
+    classify,
+    fingerprint,
+    format_categories,
+    format_errors,
+    status_class,
+    top_errors,
+)
+
+
+def _raise(error):
+    raise error
+
+
+class TestErrors(unittest.TestCase):
+    def _catch(self, error):
+        try:
+            _raise(error)
+        except Exception as e:
+            return e
+
+    def test_fingerprint(self):
+        one = fingerprint(self._catch(ValueError("one")))
+        two = fingerprint(self._catch(ValueError("two")))
+        # the message is not part of the fingerprint
+        self.assertEqual(one, two)
+        self.assertTrue(one.startswith("ValueError at test_errors.py:"), one)
+        self.assertNotEqual(one, fingerprint(self._catch(KeyError())))
+
+    def test_fingerprint_not_raised(self):
+        self.assertEqual(fingerprint(ValueError()), "ValueError")
+
+    def test_top_errors(self):
+        counts = {"b": 2, "a": 2, "c": 10, "d": 1}
+        self.assertEqual(top_errors(counts, 3), [("c", 10), ("a", 2), ("b", 2)])
+
+    def test_format_errors(self):
+        counts = {"ValueError at loadtest.py:12": 3, "KeyError at loadtest.py:20": 1}
+        lines = format_errors(counts, limit=1).split("\n")
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[0].startswith("ERROR"))
+        self.assertTrue(lines[1].startswith("ValueError at loadtest.py:12"))
+        self.assertTrue(lines[1].endswith(" 3"))
+        self.assertEqual(lines[2], "(1 more)")
+
+    def test_classify(self):
+        self.assertEqual(classify(AssertionError()), "FAILED_ASSERTION")
+        self.assertEqual(classify(asyncio.TimeoutError()), "FAILED_TIMEOUT")
+        # a connection error too
+        self.assertEqual(classify(ServerTimeoutError()), "FAILED_TIMEOUT")
+        self.assertEqual(classify(ServerDisconnectedError()), "FAILED_DISCONNECT")
+        error = ClientConnectorError(None, OSError(111, "Connection refused"))
+        self.assertEqual(classify(error), "FAILED_CONNECTION")
+        self.assertEqual(classify(ConnectionResetError()), "FAILED_CONNECTION")
+        self.assertEqual(classify(ValueError()), "FAILED_OTHER")
+
+    def test_status_class(self):
+        self.assertEqual(status_class(404), "HTTP_4XX")
+        self.assertEqual(status_class(503), "HTTP_5XX")
+        self.assertIsNone(status_class(302))
+
+    def test_format_categories(self):
+        results = {"FAILED_TIMEOUT": 3, "FAILED_ASSERTION": 0, "HTTP_5XX": 12}
+        self.assertEqual(format_categories(results), "TIMEOUT: 3 | HTTP_5XX: 12")
+        self.assertEqual(format_categories({}), "")
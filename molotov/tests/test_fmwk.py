@@ -15,6 +15,7 @@ from molotov.api import (
 )
 from molotov.runner import Runner
 from molotov.session import get_session
+from molotov.shared import Counters, SlidingWindow
 from molotov.tests.support import (
     TestLoop,
     async_test,
@@ -23,6 +24,7 @@ from molotov.tests.support import (
     dedicatedloop,
     patch_errors,
 )
+from molotov.ui.controllers import TerminalController
 from molotov.util import get_var, json_request, request, set_var, stop_reason
 from molotov.worker import Worker
 
@@ -95,6 +97,86 @@ class TestFmwk(TestLoop):
             result = await w.step(0)
             self.assertTrue(result, -1)
 
+    @async_test
+    async def test_failure_without_categories(self, loop, console, results):
+        @scenario()
+        async def failing(session):
+            raise AssertionError()
+
+        # counters without the failure categories
+        results = Counters("OK", "FAILED", "REACHED", "WORKER", "MAX_WORKERS")
+        args = self.get_args(console=console)
+        args.exception = False
+        args.max_runs = 2
+        w = self.get_worker(console, results, loop=loop, args=args)
+        await w.run()
+
+        self.assertEqual(results["OK"], 0)
+        self.assertEqual(results["FAILED"], 2)
+
+    @async_test
+    async def test_failure_with_markup(self, loop, console, results):
+        @scenario()
+        async def failing(session):
+            raise ValueError("got <html> back")
+
+        # the terminal console, used when stdin is a terminal
+        console.terminal = console.errors = TerminalController()
+        args = self.get_args(console=console)
+        args.exception = False
+        args.max_runs = 3
+        w = self.get_worker(console, results, loop=loop, args=args)
+        await w.run()
+
+        # printing the failures doesn't kill the worker
+        self.assertEqual(results["FAILED"], 3)
+
+    @async_test
+    async def test_origins(self, loop, console, results):
+        @scenario()
+        async def failing(session):
+            raise AssertionError()
+
+        args = self.get_args(console=console)
+        args.exception = False
+        args.max_runs = 3
+        origins = {}
+        w = Worker(1, results, console, args, loop=loop, origins=origins)
+        await w.run()
+
+        self.assertEqual(len(origins), 1)
+        origin, count = origins.popitem()
+        self.assertTrue(origin.startswith("AssertionError at test_fmwk.py:"))
+        self.assertEqual(count, 3)
+
+    @async_test
+    async def test_sizing_window_rollover(self, loop, console, results):
+        now = [0.0]
+        window = SlidingWindow(clock=lambda: now[0])
+        args = self.get_args(console=console)
+        args.sizing = True
+        args.sizing_tolerance = 5
+        w = Worker(1, results, console, args, loop=loop, window=window)
+
+        for _ in range(200):
+            window.add(True)
+        for _ in range(8):
+            window.add(False)
+        # 4% of errors
+        self.assertFalse(w._reached_tolerance())
+
+        # a minute later, the first successes are out of the window
+        now[0] += 61
+        for _ in range(100):
+            window.add(True)
+        for _ in range(6):
+            window.add(False)
+        # 6% of errors in the last minute, 4.7% overall
+        self.assertTrue(w._reached_tolerance())
+        self.assertEqual(results["REACHED"], 1)
+        self.assertEqual(results["MINUTE_OK"], 100)
+        self.assertEqual(results["MINUTE_FAILED"], 6)
+
     @async_test
     async def test_aworker(self, loop, console, results):
         res = []
@@ -0,0 +1,92 @@
+import random
+import unittest
+
+from molotov.shared.histogram import OTHERS, Histogram, Histograms
+
+
+class TestHistogram(unittest.TestCase):
+    def test_percentiles(self):
+        histogram = Histogram()
+        for i in range(1, 1001):
+            histogram.record(i / 1000.0)
+
+        res = histogram.percentiles()
+        self.assertEqual(res["count"], 1000)
+        self.assertEqual(res["max"], 1.0)
+        # ~3% precision
+        self.assertAlmostEqual(res["p50"], 0.5, delta=0.5 * 0.03)
+        self.assertAlmostEqual(res["p90"], 0.9, delta=0.9 * 0.03)
+        self.assertAlmostEqual(res["p99"], 0.99, delta=0.99 * 0.03)
+        self.assertAlmostEqual(histogram.mean(), 0.5005, places=3)
+
+    def test_empty(self):
+        histogram = Histogram()
+        self.assertEqual(histogram.percentile(99), 0.0)
+        self.assertEqual(histogram.mean(), 0.0)
+        repr(histogram)
+
+    def test_small_and_huge_values(self):
+        histogram = Histogram()
+        histogram.record(0.0)
+        histogram.record(-1.0)
+        histogram.record(0.000001)
+        histogram.record(10**7)
+        self.assertEqual(histogram.count, 4)
+        self.assertEqual(histogram.percentile(25), 0.0)
+        self.assertEqual(histogram.percentile(75), 0.000001)
+
+    def test_record_corrected(self):
+        histogram = Histogram()
+        # a 1s stall when we expect a sample every 100ms
+        histogram.record_corrected(1.0, 0.1)
+        self.assertEqual(histogram.count, 10)
+        self.assertAlmostEqual(histogram.percentile(50), 0.5, delta=0.5 * 0.03)
+
+        histogram = Histogram()
+        histogram.record_corrected(0.05, 0.1)
+        histogram.record_corrected(0.05, 0)
+        self.assertEqual(histogram.count, 2)
+
+    def test_merge_and_snapshot(self):
+        one, two = Histogram(), Histogram()
+        for _ in range(500):
+            one.record(random.random())
+            two.record(random.random() + 1)
+
+        merged = Histogram.from_snapshot(one.snapshot())
+        merged.merge(two)
+        self.assertEqual(merged.count, 1000)
+        self.assertEqual(merged.max, two.max)
+        self.assertTrue(merged.percentile(50) <= 1.03)
+
+    def test_histograms(self):
+        histograms = Histograms()
+        histograms["scenario", "one"].record(0.1)
+        histograms["scenario", "two"].record(0.2)
+        histograms["request", "GET localhost/"].record(0.3)
+        self.assertTrue(("scenario", "one") in histograms)
+        self.assertEqual(len(histograms), 3)
+
+        copy = Histograms.from_snapshot(histograms.snapshot())
+        copy.merge(histograms)
+
+        scenarios = copy.percentiles("scenario")
+        self.assertEqual(list(scenarios), ["one", "two"])
+        self.assertEqual(scenarios["one"]["count"], 2)
+        self.assertEqual(list(copy.percentiles("request")), ["GET localhost/"])
+
+    def test_bounded(self):
+        histograms = Histograms()
+        histograms["scenario", "one"].record(0.1)
+        for user in range(5):
+            histograms.bounded("request", "GET /users/%d" % user, 2).record(0.1)
+        histograms.bounded("request", "GET /users/0", 2).record(0.1)
+
+        counts = histograms.counts("request")
+        self.assertEqual(counts, {OTHERS: 3, "GET /users/0": 2, "GET /users/1": 1})
+        # the limit is by kind
+        self.assertTrue(histograms.bounded("scenario", "two", 2) is histograms["scenario", "two"])
+
+        copy = Histograms.from_snapshot(histograms.snapshot())
+        copy.bounded("request", "GET /users/9", 2).record(0.1)
+        self.assertEqual(copy.counts("request")[OTHERS], 4)
@@ -1,3 +1,5 @@
+import asyncio
+
 from molotov.listeners import BaseListener, EventSender
 from molotov.tests.support import TestLoop, async_test, patch_errors
 
@@ -35,3 +37,36 @@ class TestListeners(TestLoop):
         await eventer.send_event("my_event")
 
         self.assertTrue("Bam" in console_print())
+
+    @async_test
+    async def test_no_listener(self, loop, console, results):
+        class MyListener(BaseListener):
+            def __init__(self):
+                self.events = []
+
+            async def on_my_event(self, **options):
+                self.events.append(options)
+
+        eventer = EventSender(console)
+        # nobody listens, no coroutine is created
+        self.assertFalse(asyncio.iscoroutine(eventer.send_event("my_event")))
+        await eventer.send_event("my_event")
+
+        listener = MyListener()
+        eventer.add_listener(listener)
+        self.assertFalse(asyncio.iscoroutine(eventer.send_event("other_event")))
+        await eventer.send_event("my_event", value=1)
+        self.assertEqual(listener.events, [{"value": 1}])
+
+    @async_test
+    async def test_callable_listener(self, loop, console, results):
+        received = []
+
+        async def listener(event, **options):
+            received.append(event)
+
+        eventer = EventSender(console)
+        eventer.add_listener(listener)
+        await eventer.send_event("one")
+        await eventer.send_event("two")
+        self.assertEqual(received, ["one", "two"])
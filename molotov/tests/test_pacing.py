@@ -0,0 +1,56 @@
+import asyncio
+from time import perf_counter
+
+from molotov.pacing import Pacer, TokenBucket
+from molotov.tests.support import TestLoop, async_test
+
+
+class TestPacer(TestLoop):
+    @async_test
+    async def test_pace(self, loop, console, results):
+        pacer = Pacer(0.05)
+        starts = []
+        for _ in range(4):
+            await pacer.wait()
+            starts.append(perf_counter())
+            # the scenario takes some of the interval
+            await asyncio.sleep(0.02)
+
+        intervals = [starts[i + 1] - starts[i] for i in range(len(starts) - 1)]
+        for interval in intervals:
+            self.assertAlmostEqual(interval, 0.05, delta=0.015)
+
+    @async_test
+    async def test_late(self, loop, console, results):
+        pacer = Pacer(0.01)
+        await pacer.wait()
+        await asyncio.sleep(0.05)
+        # late: starts right away, without catching up
+        started = perf_counter()
+        await pacer.wait()
+        await pacer.wait()
+        self.assertTrue(perf_counter() - started >= 0.009)
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, Pacer, 0)
+        self.assertRaises(ValueError, TokenBucket, 0, 1)
+        self.assertRaises(ValueError, TokenBucket, 1, 0)
+
+
+class TestTokenBucket(TestLoop):
+    @async_test
+    async def test_rate(self, loop, console, results):
+        bucket = TokenBucket(rate=100, capacity=2)
+        counts = [0, 0]
+
+        async def worker(index):
+            started = perf_counter()
+            while perf_counter() - started < 0.2:
+                await bucket.wait()
+                counts[index] += 1
+                await asyncio.sleep(0)
+
+        await asyncio.gather(worker(0), worker(1))
+        # 2 tokens at first, then 100 per second for 0.2s
+        self.assertTrue(15 <= sum(counts) <= 25, counts)
+        self.assertTrue(all(count > 0 for count in counts), counts)
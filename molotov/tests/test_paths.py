@@ -0,0 +1,47 @@
+import unittest
+
+from molotov.paths import PathNormalizer, get_normalizer
+from molotov.tests.support import TestLoop
+
+
+class TestPathNormalizer(unittest.TestCase):
+    def test_auto(self):
+        normalizer = PathNormalizer(auto=True)
+        self.assertEqual(normalizer("/users/1234"), "/users/{id}")
+        self.assertEqual(
+            normalizer("/users/1234/files/3f2504e0-4f89-11d3-9a0c-0305e82c3301/"),
+            "/users/{id}/files/{uuid}/",
+        )
+        self.assertEqual(normalizer("/v2/users"), "/v2/users")
+        self.assertEqual(normalizer("/"), "/")
+
+    def test_rules(self):
+        normalizer = PathNormalizer(
+            rules=[("^/users/[^/]+", "/users/{name}"), (r"\.(json|xml)$", ".{format}")]
+        )
+        self.assertEqual(normalizer("/users/tarek/feed.json"), "/users/{name}/feed.{format}")
+        self.assertEqual(normalizer("/users/1234"), "/users/{name}")
+        # no automatic replacement
+        self.assertEqual(normalizer("/items/1234"), "/items/1234")
+
+    def test_rules_then_auto(self):
+        normalizer = PathNormalizer(rules=[("^/api/v[0-9]+", "/api")], auto=True)
+        self.assertEqual(normalizer("/api/v2/items/12"), "/api/items/{id}")
+
+    def test_cache(self):
+        normalizer = PathNormalizer(auto=True, cache_size=2)
+        for _ in range(3):
+            normalizer("/users/1")
+        info = normalizer.normalize.cache_info()
+        self.assertEqual((info.hits, info.misses, info.maxsize), (2, 1, 2))
+
+
+class TestGetNormalizer(TestLoop):
+    def test_get_normalizer(self):
+        args = self.get_args()
+        self.assertIsNone(get_normalizer(args))
+        args.normalize_paths = True
+        self.assertTrue(get_normalizer(args).auto)
+        args.normalize_paths = False
+        args.path_rule = [["^/a", "/b"]]
+        self.assertEqual(get_normalizer(args)("/a/c"), "/b/c")
@@ -0,0 +1,109 @@
+import csv
+import json
+import os
+import tempfile
+import unittest
+from argparse import Namespace
+
+from molotov import __version__
+from molotov.report import build_report, get_format, write_report
+
+_LATENCY = {"count": 3, "p50": 0.1, "p90": 0.2, "p99": 0.3, "p999": 0.3, "max": 0.3}
+
+
+def _results():
+    return {
+        "OK": 2,
+        "FAILED": 1,
+        "RATIO": 0.0,
+        "SCENARIOS": {"one": dict(_LATENCY, failed=1)},
+        "REQUESTS": {"GET localhost/": dict(_LATENCY)},
+        "ERRORS": {"AssertionError": 1},
+        "ORIGINS": {"AssertionError at loadtest.py:12": 1},
+    }
+
+
+class TestReport(unittest.TestCase):
+    def setUp(self):
+        self.args = Namespace(
+            processes=1, workers=2, scenario="loadtest.py", shared_console=object()
+        )
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        for name in os.listdir(self.dir):
+            os.remove(os.path.join(self.dir, name))
+        os.rmdir(self.dir)
+
+    def test_get_format(self):
+        self.assertEqual(get_format("results.json"), ".json")
+        self.assertEqual(get_format("results.CSV"), ".csv")
+        self.assertIsNone(get_format("results.txt"))
+
+    def test_build_report(self):
+        results = _results()
+        results["TIMELINE"] = [{"elapsed": 1.0, "name": "one", "count": 3}]
+        results["AUTOTUNE"] = [{"concurrency": 2, "rps": 1.5}]
+        report = build_report(results, self.args, 1000.0, 1002.0)
+        self.assertEqual(report["metadata"]["version"], __version__)
+        self.assertEqual(report["metadata"]["duration"], 2.0)
+        self.assertEqual(report["metadata"]["workers"], 2)
+        # only serializable args are kept
+        self.assertFalse("shared_console" in report["metadata"]["args"])
+        self.assertEqual(report["totals"], {"OK": 2, "FAILED": 1, "RATIO": 0.0})
+        self.assertEqual(report["throughput"], 1.5)
+        self.assertEqual(report["errors"], {"AssertionError": 1})
+        self.assertEqual(report["origins"], {"AssertionError at loadtest.py:12": 1})
+        self.assertEqual(report["corrected"], {})
+        self.assertEqual(report["endpoints"], {})
+        self.assertEqual(report["autotune"], [{"concurrency": 2, "rps": 1.5}])
+        self.assertEqual(len(report["timeline"]), 1)
+        self.assertEqual(sorted(report["totals"]), ["FAILED", "OK", "RATIO"])
+
+    def test_write_csv_endpoints(self):
+        results = _results()
+        results["ENDPOINTS"] = {"GET / 200": dict(_LATENCY)}
+        path = os.path.join(self.dir, "results.csv")
+        write_report(path, build_report(results, self.args, 1000.0, 1002.0))
+        with open(path) as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual((rows[3]["kind"], rows[3]["name"]), ("endpoint", "GET / 200"))
+        self.assertEqual(rows[3]["count"], "3")
+
+    def test_write_csv_categories(self):
+        results = dict(_results(), FAILED_ASSERTION=1, HTTP_5XX=4)
+        path = os.path.join(self.dir, "results.csv")
+        write_report(path, build_report(results, self.args, 1000.0, 1002.0))
+        with open(path) as f:
+            rows = list(csv.DictReader(f))
+        rows = [(row["name"], row["count"]) for row in rows if row["kind"] == "category"]
+        self.assertEqual(rows, [("FAILED_ASSERTION", "1"), ("HTTP_5XX", "4")])
+
+    def test_write_json(self):
+        path = os.path.join(self.dir, "results.json")
+        write_report(path, build_report(_results(), self.args, 1000.0, 1002.0))
+        with open(path) as f:
+            report = json.load(f)
+        self.assertEqual(report["scenarios"]["one"]["failed"], 1)
+
+    def test_write_csv(self):
+        path = os.path.join(self.dir, "results.csv")
+        write_report(path, build_report(_results(), self.args, 1000.0, 1002.0))
+        with open(path) as f:
+            rows = list(csv.DictReader(f))
+        kinds = [(row["kind"], row["name"]) for row in rows]
+        self.assertEqual(
+            kinds,
+            [
+                ("total", ""),
+                ("scenario", "one"),
+                ("request", "GET localhost/"),
+                ("error", "AssertionError"),
+                ("origin", "AssertionError at loadtest.py:12"),
+            ],
+        )
+        self.assertEqual(rows[1]["p99"], "0.3")
+
+    def test_write_unknown(self):
+        path = os.path.join(self.dir, "results.txt")
+        self.assertRaises(ValueError, write_report, path, {})
@@ -0,0 +1,143 @@
+import asyncio
+import io
+import socket
+
+from molotov import resolver
+from molotov.api import scenario
+from molotov.run import main, run
+from molotov.session import get_session
+from molotov.tests.support import TestLoop, async_test, coserver, dedicatedloop, set_args
+
+_RUNS = []
+
+
+class FakeResolver:
+    def __init__(self, ips=("10.0.0.1", "10.0.0.2")):
+        self.ips = ips
+        self.calls = 0
+
+    async def resolve(self, host, port=0, family=socket.AF_INET):
+        self.calls += 1
+        await asyncio.sleep(0)
+        return [
+            {
+                "hostname": host,
+                "host": ip,
+                "port": port,
+                "family": socket.AF_INET,
+                "proto": 0,
+                "flags": socket.AI_NUMERICHOST,
+            }
+            for ip in self.ips
+        ]
+
+    async def close(self):
+        pass
+
+
+class TestResolver(TestLoop):
+    def test_parse_pin(self):
+        self.assertEqual(resolver.parse_pin("example.com:10.0.0.1"), ("example.com", ["10.0.0.1"]))
+        self.assertEqual(
+            resolver.parse_pin("example.com:10.0.0.1,::1"),
+            ("example.com", ["10.0.0.1", "::1"]),
+        )
+        for value in ("example.com", "example.com:", ":10.0.0.1", "example.com:nope"):
+            self.assertRaises(ValueError, resolver.parse_pin, value)
+
+    @async_test
+    async def test_cache(self, loop, console, results):
+        resolver.configure(ttl=10)
+        fake = FakeResolver()
+        caching = resolver.CachingResolver(fake)
+
+        # concurrent lookups are done once
+        res = await asyncio.gather(*[caching.resolve("example.com", 80) for _ in range(5)])
+        self.assertEqual(fake.calls, 1)
+        self.assertEqual(res[0][0]["port"], 80)
+
+        # the addresses are round-robined
+        firsts = [addresses[0]["host"] for addresses in res]
+        self.assertEqual(firsts, ["10.0.0.1", "10.0.0.2"] * 2 + ["10.0.0.1"])
+
+        # the cache is shared by all resolvers
+        other = resolver.CachingResolver(fake)
+        await other.resolve("example.com", 443)
+        self.assertEqual(fake.calls, 1)
+
+    @async_test
+    async def test_ttl(self, loop, console, results):
+        resolver.configure(ttl=0)
+        fake = FakeResolver()
+        caching = resolver.CachingResolver(fake)
+        await caching.resolve("example.com", 80)
+        await caching.resolve("example.com", 80)
+        self.assertEqual(fake.calls, 2)
+
+    @async_test
+    async def test_pinned(self, loop, console, results):
+        resolver.configure(pins={"example.com": ["10.0.0.5", "::1"]})
+        fake = FakeResolver()
+        caching = resolver.CachingResolver(fake)
+
+        addresses = await caching.resolve("example.com", 80, family=socket.AF_UNSPEC)
+        self.assertEqual([address["host"] for address in addresses], ["10.0.0.5", "::1"])
+        addresses = await caching.resolve("example.com", 80, family=socket.AF_INET)
+        self.assertEqual([address["host"] for address in addresses], ["10.0.0.5"])
+        self.assertEqual(fake.calls, 0)
+
+    @async_test
+    async def test_session(self, loop, console, results):
+        async with get_session(loop, console) as session:
+            self.assertFalse(isinstance(session.connector._resolver, resolver.CachingResolver))
+        resolver.configure()
+        async with get_session(loop, console) as session:
+            self.assertTrue(isinstance(session.connector._resolver, resolver.CachingResolver))
+
+    @dedicatedloop
+    def test_run(self):
+        with coserver() as port:
+            warmed = []
+
+            @scenario()
+            async def pinned(session):
+                async with session.get("http://molotov.test:%s" % port) as resp:
+                    self.assertEqual(resp.status, 200)
+                warmed.append(("localhost", socket.AF_UNSPEC) in resolver._DNS_CACHE)
+
+            args = self.get_args()
+            args.max_runs = 2
+            args.duration = 9999
+            args.dns_resolve = ["molotov.test:127.0.0.1"]
+            args.dns_warm = ["localhost"]
+            args.scenario = "molotov.tests.test_resolver"
+            results = run(args, stream=io.StringIO())
+
+        self.assertEqual(results["OK"], 2)
+        self.assertEqual(warmed, [True, True])
+        # the cache does not outlive the run
+        self.assertFalse(resolver.is_enabled())
+        self.assertEqual(resolver._DNS_CACHE, {})
+
+    @dedicatedloop
+    def test_warm_before_scenario(self):
+        @scenario()
+        async def warm_scenario(session):
+            _RUNS.append(resolver.is_enabled())
+
+        # the scenario is not taken as a host to warm
+        with set_args(
+            "molotov",
+            "--dns-cache",
+            "--dns-warm",
+            "localhost",
+            "-r",
+            "1",
+            "-q",
+            "molotov.tests.test_resolver",
+        ):
+            try:
+                main()
+            except SystemExit:
+                pass
+        self.assertEqual(_RUNS, [True])
@@ -0,0 +1,120 @@
+import os
+import unittest
+
+import multiprocess
+
+from molotov.shared import RingBuffer
+from molotov.ui.controllers import TerminalController
+
+# pre-forked buffer
+_RING = RingBuffer(100)
+
+
+def run_writer(index):
+    for line in range(10):
+        _RING.append("process %d line %d" % (index, line))
+
+
+class TestRingBuffer(unittest.TestCase):
+    def test_ring(self):
+        ring = RingBuffer(3, line_size=8)
+        for i in range(5):
+            ring.append("line %d" % i)
+        # only the last 3 lines are kept
+        self.assertEqual(ring.lines(), ["line 2", "line 3", "line 4"])
+        self.assertEqual(len(ring), 3)
+
+        self.assertEqual(ring.pop(2), ["line 2", "line 3"])
+        self.assertEqual(ring.lines(), ["line 4"])
+        ring.append("line 5")
+        self.assertEqual(ring.pop(10), ["line 4", "line 5"])
+        self.assertEqual(ring.lines(), [])
+
+        ring.append("éééé")
+        self.assertEqual(ring.lines(), ["éééé"])
+        # lines are not truncated, they could lose a character or some markup
+        self.assertRaises(ValueError, ring.append, "a much longer line")
+        self.assertRaises(ValueError, ring.append, "ééééé")
+        self.assertEqual(ring.lines(), ["éééé"])
+        ring.clear()
+        self.assertEqual(len(ring), 0)
+
+    @unittest.skipIf(os.name == "nt", "win32")
+    def test_processes(self):
+        processes = [multiprocess.Process(target=run_writer, args=(i,)) for i in range(4)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        lines = _RING.lines()
+        self.assertEqual(len(lines), 40)
+        for index in range(4):
+            mine = [line for line in lines if line.startswith("process %d " % index)]
+            self.assertEqual(mine, ["process %d line %d" % (index, line) for line in range(10)])
+
+
+class TestTerminalController(unittest.TestCase):
+    def test_multiprocess(self):
+        controller = TerminalController(max_lines=2, single_process=False)
+        for i in range(3):
+            controller.write_line("line %d" % i)
+        controller.write_line("x" * 1000)
+        lines = controller.lines()
+        self.assertEqual(lines[0], "line 2\n")
+        self.assertEqual(lines[1], "x" * 256 + "...\n")
+        self.assertEqual(list(controller.dump(1)), ["line 2\n"])
+        self.assertEqual(len(controller.lines()), 1)
+        controller.create_content(80, 10)
+
+    def test_multiprocess_long_lines(self):
+        controller = TerminalController(max_lines=5, single_process=False)
+        # written from another process, with the pid header
+        controller._creator = -1
+        controller.write_line("é😀" * 500, fg="gray")
+        controller.write_line("<b>%s</b>" % ("😀" * 500), fg="gray")
+        controller.write_line("&" * 500)
+        lines = controller.lines()
+        self.assertTrue(lines[0].endswith("é😀" * 128 + "...</style>\n"))
+        self.assertIn("&lt;b&gt;", lines[1])
+        self.assertTrue(lines[2].endswith("&amp;" * 256 + "...\n"))
+        content = controller.create_content(80, 10)
+        text = "".join(fragment[1] for fragment in content.get_line(1))
+        self.assertTrue(text.endswith("é😀" * 128 + "..."))
+        text = "".join(fragment[1] for fragment in content.get_line(2))
+        self.assertIn("<b>" + "😀" * 253 + "...", text)
+
+    def test_content(self):
+        controller = TerminalController(max_lines=5)
+        controller.write_line("one")
+        controller.write_line("two", fg="gray")
+        content = controller.create_content(80, 10)
+        self.assertEqual(content.line_count, 4)
+        self.assertEqual(content.get_line(1), [("", "one")])
+        self.assertEqual(content.get_line(2), [("fg:gray", "two")])
+        # the content is only rebuilt when lines change
+        self.assertIs(controller.create_content(80, 10), content)
+        controller.write_line("three")
+        content = controller.create_content(80, 10)
+        self.assertEqual(content.line_count, 5)
+        controller.close()
+        content = controller.create_content(80, 10)
+        self.assertEqual(content.get_line(1), [("", "data stream closed!")])
+
+    def test_stray_markup(self):
+        controller = TerminalController(max_lines=5)
+        controller.write_line('ValueError("got <html> back")', fg="gray")
+        controller.write_line('  File "<string>", line 1, in <module>')
+        content = controller.create_content(80, 10)
+        text = "".join(fragment[1] for fragment in content.get_line(1))
+        self.assertEqual(text, '<style fg="gray">ValueError("got <html> back")</style>')
+        self.assertEqual(content.get_line(2), [("", '  File "<string>", line 1, in <module>')])
+
+    def test_content_multiprocess(self):
+        controller = TerminalController(max_lines=5, single_process=False)
+        controller.write_line("one")
+        content = controller.create_content(80, 10)
+        self.assertIs(controller.create_content(80, 10), content)
+        list(controller.dump(5))
+        content = controller.create_content(80, 10)
+        self.assertEqual(content.line_count, 2)
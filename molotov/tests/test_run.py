@@ -6,6 +6,7 @@ import os
 import random
 import re
 import signal
+import tempfile
 import time
 import unittest
 from collections import defaultdict
@@ -14,10 +15,12 @@ from unittest.mock import patch
 import aiohttp
 
 from molotov import __version__
-from molotov.api import global_setup, scenario
+from molotov.api import global_setup, scenario, setup_session
 from molotov.run import main, run
+from molotov.runner import Runner
 from molotov.session import get_context
 from molotov.shared.counter import Counters
+from molotov.shared.timeline import Timeline
 from molotov.tests._grpc import service as grpc_service
 from molotov.tests.statsd import run_server, stop_server
 from molotov.tests.support import (
@@ -31,7 +34,7 @@ from molotov.tests.support import (
     set_args,
     skip_pypy,
 )
-from molotov.util import json_request, request, set_timer
+from molotov.util import json_request, request
 
 _HERE = os.path.dirname(__file__)
 _CONFIG = os.path.join(_HERE, "molotov.json")
@@ -459,6 +462,164 @@ class TestRunner(TestLoop):
             )
             self.assertTrue(ratio >= 4.75, ratio)
 
+    def _test_pace(self, bucket):
+        @scenario()
+        async def paced(session):
+            await asyncio.sleep(0.01)
+
+        args = self._get_args()
+        args.duration = 0.5
+        args.debug = False
+        args.workers = 2
+        args.pace = 0.1
+        args.pace_bucket = bucket
+        args.single_mode = "paced"
+        return run(args, stream=io.StringIO())
+
+    @dedicatedloop
+    def test_pace(self):
+        res = self._test_pace(bucket=False)
+        # two workers running every 0.1s for 0.5s
+        self.assertTrue(8 <= res["OK"] <= 12, res["OK"])
+
+    @dedicatedloop
+    def test_pace_bucket(self):
+        res = self._test_pace(bucket=True)
+        # 2 tokens at first, then 20 per second for 0.5s
+        self.assertTrue(10 <= res["OK"] <= 14, res["OK"])
+
+    def test_pace_and_rate(self):
+        stdout, stderr, rc = self._test_molotov(
+            "--pace", "0.1", "--rate", "10", "molotov.tests.test_run"
+        )
+        self.assertTrue("You can't use --pace with --rate" in stdout, stdout)
+
+    @dedicatedloop
+    def test_fractional_duration(self):
+        @scenario()
+        async def short(session):
+            await asyncio.sleep(0.01)
+
+        args = self._get_args()
+        args.duration = 0.5
+        args.debug = False
+        args.single_mode = "short"
+        started = time.perf_counter()
+        res = run(args, stream=io.StringIO())
+        elapsed = time.perf_counter() - started
+
+        self.assertTrue(0.5 <= elapsed < 0.9, elapsed)
+        self.assertTrue(30 < res["OK"] <= 50, res["OK"])
+
+    def test_last_complete_index(self):
+        for processes, index in ((1, 2), (2, 1)):
+            runner = self._latency_runner(processes)
+            now = runner.timeline.started + 0.35
+            with patch("molotov.runner.perf_counter", return_value=now):
+                self.assertEqual(runner._last_complete_index(), index)
+
+    @dedicatedloop
+    def test_latency_sizing(self):
+        @scenario()
+        async def slow(session):
+            # always over the target
+            await asyncio.sleep(0.03)
+
+        args = self._get_args()
+        args.sizing = True
+        args.sizing_latency = 20.0
+        args.sizing_window = 0.5
+        args.timeline_interval = 0.1
+        args.workers = 20
+        args.duration = 10
+        args.single_mode = "slow"
+        stream = io.StringIO()
+        res = run(args, stream=stream)
+
+        self.assertEqual(res["REACHED"], 1)
+        self.assertTrue(res["SLO_LATENCY"] > 0.02, res["SLO_LATENCY"])
+        stream.seek(0)
+        output = stream.read()
+        self.assertTrue("Max sustainable throughput" in output, output)
+        self.assertTrue("P99 below 20.00ms" in output, output)
+
+    def _latency_runner(self, processes=1):
+        args = self._get_args()
+        args.processes = processes
+        args.sizing = True
+        args.sizing_latency = 20.0
+        args.sizing_window = 0.2
+        args.timeline_interval = 0.1
+        return Runner(args)
+
+    def _record(self, timeline, index, latency, count=100):
+        now = timeline.started + (index + 0.5) * timeline.interval
+        for _ in range(count):
+            timeline.record("one", now, latency)
+
+    def test_check_latency(self):
+        runner = self._latency_runner()
+        timeline = runner.timeline
+        self._record(timeline, 0, 0.001, count=50)
+        # not enough samples
+        self.assertFalse(runner.check_latency(0))
+        self._record(timeline, 1, 0.001, count=150)
+        self.assertFalse(runner.check_latency(1))
+        # 200 samples in 0.2s
+        self.assertEqual(runner._results["THROUGHPUT"].value, 100000)
+        self._record(timeline, 2, 0.05)
+        self._record(timeline, 3, 0.05)
+        self.assertTrue(runner.check_latency(3))
+        self.assertEqual(runner._results["REACHED"].value, 1)
+        self.assertTrue(runner._results["SLO_LATENCY"].value > 20000)
+        self.assertEqual(runner._results["THROUGHPUT"].value, 100000)
+
+    def test_check_latency_processes(self):
+        runner = self._latency_runner(processes=2)
+        for pid in (1, 2):
+            timeline = Timeline(runner.timeline.started, interval=0.1)
+            # each process alone doesn't have enough samples
+            self._record(timeline, 0, 0.05, count=60)
+            runner._process_timelines[pid] = timeline.snapshot()
+        self.assertTrue(runner.check_latency(0))
+        self.assertEqual(runner._results["REACHED"].value, 1)
+
+    @dedicatedloop
+    def test_autotune(self):
+        # the service handles 2 concurrent requests
+        semaphore = asyncio.Semaphore(2)
+
+        @scenario()
+        async def saturated(session):
+            async with semaphore:
+                await asyncio.sleep(0.01)
+
+        args = self._get_args()
+        args.autotune = True
+        args.autotune_stage = 0.5
+        args.autotune_max_workers = 8
+        args.duration = 9999
+        args.debug = False
+        args.timeline_interval = 0.05
+        args.single_mode = "saturated"
+        stream = io.StringIO()
+        res = run(args, stream=stream)
+
+        tried = [stage["concurrency"] for stage in res["AUTOTUNE"]]
+        self.assertEqual(tried[:2], [1, 2])
+        self.assertTrue(all(stage["rps"] > 0 for stage in res["AUTOTUNE"]), res["AUTOTUNE"])
+        stream.seek(0)
+        output = stream.read()
+        self.assertTrue("Knee: 2 workers" in output, output)
+
+    def test_autotune_and_sizing(self):
+        stdout, stderr, rc = self._test_molotov("--autotune", "--sizing", "molotov.tests.test_run")
+        self.assertTrue("You can't use --autotune" in stdout, stdout)
+
+    def test_sizing_latency_negative(self):
+        stdout, stderr, rc = self._test_molotov("--sizing-latency", "0", "molotov.tests.test_run")
+        self.assertTrue("need to be positive" in stdout, stdout)
+
     @co_catch_output
     @unittest.skipIf(os.name == "nt", "win32")
     @dedicatedloop_noclose
@@ -495,23 +656,11 @@ class TestRunner(TestLoop):
     def test_timed_sizing(self):
         _RES2["fail"] = 0
         _RES2["succ"] = 0
-        _RES2["messed"] = False
 
         with catch_sleep():
 
             @scenario()
             async def sizer(session):
-                if get_context(session).worker_id == 200 and not _RES2["messed"]:
-                    # worker 2 will mess with the timer
-                    # since we're faking all timers, the current
-                    # time in the test is always around 0
-                    # so to have now() - get_timer() > 60
-                    # we need to set a negative value here
-                    # to trick it
-                    set_timer(-61)
-                    _RES2["messed"] = True
-                    _RES2["fail"] = _RES2["succ"] = 0
-
                 if get_context(session).worker_id > 100:
                     # starting to introduce errors passed the 100th
                     if random.randint(0, 10) == 1:
@@ -872,3 +1021,378 @@ class TestRunner(TestLoop):
         with coserver():
             stdout, stderr, rc = self._test_molotov("--max-runs", "1", "-c", test)
         self.assertTrue("Hello" in stdout, stdout)
+
+    @co_catch_output
+    @dedicatedloop
+    def test_latencies(self):
+        with coserver() as port:
+
+            @scenario(weight=10)
+            async def latency(session):
+                async with session.get("http://localhost:%s" % port) as resp:
+                    await resp.text()
+
+            args = self._get_args()
+            args.max_runs = 3
+            args.duration = 9999
+            stream = io.StringIO()
+            res = run(args, stream=stream)
+
+        self.assertEqual(res["SCENARIOS"]["latency"]["count"], 3)
+        self.assertTrue(res["SCENARIOS"]["latency"]["p99"] > 0)
+        self.assertEqual(res["REQUESTS"]["GET localhost/"]["count"], 3)
+        stream.seek(0)
+        output = stream.read()
+        self.assertTrue("P999" in output, output)
+
+    @dedicatedloop
+    def test_normalize_paths(self):
+        with coserver() as port:
+
+            @scenario()
+            async def users(session):
+                for user in range(3):
+                    async with session.get("http://localhost:%s/users/%d" % (port, user)):
+                        pass
+
+            args = self._get_args()
+            args.max_runs = 2
+            args.duration = 9999
+            args.normalize_paths = True
+            res = run(args, stream=io.StringIO())
+
+        self.assertEqual(list(res["REQUESTS"]), ["GET localhost/users/{id}"])
+        self.assertEqual(res["REQUESTS"]["GET localhost/users/{id}"]["count"], 6)
+
+    @dedicatedloop
+    @patch("molotov.session._MAX_LABELS", 2)
+    def test_request_labels_limit(self):
+        with coserver() as port:
+
+            @scenario()
+            async def users(session):
+                for user in range(4):
+                    async with session.get("http://localhost:%s/users/%d" % (port, user)):
+                        pass
+
+            args = self._get_args()
+            args.max_runs = 2
+            args.duration = 9999
+            res = run(args, stream=io.StringIO())
+
+        requests = res["REQUESTS"]
+        self.assertEqual(
+            list(requests), ["(others)", "GET localhost/users/0", "GET localhost/users/1"]
+        )
+        self.assertEqual(requests["(others)"]["count"], 4)
+
+    @dedicatedloop
+    def test_endpoint_stats(self):
+        with coserver() as port:
+
+            @scenario()
+            async def endpoints(session):
+                for path in ("/", "/users/1", "/users/2"):
+                    async with session.get("http://localhost:%s%s" % (port, path)):
+                        pass
+
+            args = self._get_args()
+            args.max_runs = 2
+            args.duration = 9999
+            args.normalize_paths = True
+            args.endpoint_stats = True
+            stream = io.StringIO()
+            res = run(args, stream=stream)
+
+        endpoints = res["ENDPOINTS"]
+        self.assertEqual(list(endpoints), ["GET / 200", "GET /users/{id} 404"])
+        self.assertEqual(endpoints["GET / 200"]["count"], 2)
+        self.assertEqual(endpoints["GET /users/{id} 404"]["count"], 4)
+        stream.seek(0)
+        self.assertTrue("GET /users/{id} 404" in stream.read())
+
+    def test_bad_path_rule(self):
+        stdout, stderr, rc = self._test_molotov("--path-rule", "(", "x", "molotov.tests.test_run")
+        self.assertTrue("Invalid --path-rule regular expression" in stdout, stdout)
+
+    @co_catch_output
+    @unittest.skipIf(os.name == "nt", "win32")
+    @dedicatedloop_noclose
+    def test_latencies_multiprocess(self):
+        @scenario()
+        async def latency(session):
+            await asyncio.sleep(0)
+
+        args = self._get_args()
+        args.processes = 2
+        args.max_runs = 5
+        args.duration = 1000
+        args.single_mode = "latency"
+        res = run(args, stream=io.StringIO())
+
+        # two processes making 5 run each
+        self.assertEqual(res["SCENARIOS"]["latency"]["count"], 10)
+        self.assertEqual(sum(row["count"] for row in res["TIMELINE"]), 10)
+
+    @dedicatedloop
+    def test_rate(self):
+        @scenario()
+        async def paced(session):
+            _RES.append(1)
+
+        stdout, stderr, rc = self._test_molotov(
+            "--rate",
+            "50",
+            "-w",
+            "2",
+            "-d",
+            "1",
+            "--arrival",
+            "poisson",
+            "-s",
+            "paced",
+            "molotov.tests.test_run",
+        )
+        self.assertTrue("DROPPED STARTS" in stdout, stdout)
+        self.assertTrue(20 < len(_RES) < 100, len(_RES))
+
+    @dedicatedloop
+    def test_rate_and_sizing(self):
+        stdout, stderr, rc = self._test_molotov(
+            "--rate", "50", "--sizing", "molotov.tests.test_run"
+        )
+        self.assertTrue("You can't use --rate and --sizing" in stdout, stdout)
+
+    @dedicatedloop
+    def test_rate_and_ramp_up(self):
+        for arrival in ("constant", "poisson"):
+            stdout, stderr, rc = self._test_molotov(
+                "--rate", "50", "--arrival", arrival, "--ramp-up", "1", "molotov.tests.test_run"
+            )
+            self.assertTrue("You can't use --ramp-up with --rate" in stdout, stdout)
+
+    @co_catch_output
+    @dedicatedloop
+    def test_co_correction(self):
+        @scenario()
+        async def stalled(session):
+            if len(_RES) == 2:
+                time.sleep(0.2)
+            _RES.append(1)
+
+        args = self._get_args()
+        args.co_correction = True
+        args.co_interval = 0.01
+        args.max_runs = 5
+        args.duration = 9999
+        stream = io.StringIO()
+        res = run(args, stream=stream)
+
+        self.assertEqual(res["SCENARIOS"]["stalled"]["count"], 5)
+        # the stall was back-filled
+        self.assertTrue(res["CORRECTED"]["stalled"]["count"] > 20)
+        stream.seek(0)
+        self.assertTrue("SCENARIO (CORRECTED)" in stream.read())
+
+    @dedicatedloop
+    def test_co_correction_no_interval(self):
+        stdout, stderr, rc = self._test_molotov("--co-correction", "molotov.tests.test_run")
+        self.assertTrue("--co-correction needs" in stdout, stdout)
+
+    @co_catch_output
+    @dedicatedloop
+    def test_output(self):
+        @scenario()
+        async def failing(session):
+            _RES.append(1)
+            if len(_RES) == 2:
+                raise AssertionError()
+
+        fd, path = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        try:
+            args = self._get_args()
+            args.exception = False
+            args.max_runs = 3
+            args.duration = 9999
+            args.output = path
+            run(args, stream=io.StringIO())
+
+            with open(path) as f:
+                report = json.load(f)
+        finally:
+            os.remove(path)
+
+        self.assertEqual(report["totals"]["OK"], 2)
+        self.assertEqual(report["scenarios"]["failing"]["failed"], 1)
+        self.assertEqual(report["errors"], {"AssertionError": 1})
+        self.assertEqual(report["metadata"]["args"]["max_runs"], 3)
+
+    @dedicatedloop
+    def test_max_tracebacks(self):
+        @scenario()
+        async def failing(session):
+            raise AssertionError()
+
+        stdout, stderr, rc = self._test_molotov(
+            "--max-tracebacks", "2", "-r", "5", "-s", "failing", "molotov.tests.test_run"
+        )
+        tracebacks = re.findall(r"^AssertionError\(\)$", stdout, re.MULTILINE)
+        self.assertEqual(len(tracebacks), 2, stdout)
+        self.assertTrue("Not displaying more AssertionError at test_run.py" in stdout, stdout)
+        self.assertTrue(re.search(r"AssertionError at test_run.py:\d+ +5", stdout), stdout)
+
+    @dedicatedloop
+    def test_failure_categories(self):
+        with coserver() as port:
+
+            @scenario()
+            async def not_found(session):
+                async with session.get("http://localhost:%s/nope" % port) as resp:
+                    assert resp.status == 200
+
+            stdout, stderr, rc = self._test_molotov(
+                "-r", "2", "-s", "not_found", "molotov.tests.test_run"
+            )
+        self.assertTrue("ASSERTION: 2 | HTTP_4XX: 2" in stdout, stdout)
+
+    @dedicatedloop
+    def test_max_tracebacks_negative(self):
+        stdout, stderr, rc = self._test_molotov("--max-tracebacks", "-1", "molotov.tests.test_run")
+        self.assertTrue("--max-tracebacks value can't" in stdout, stdout)
+
+    @dedicatedloop
+    def test_progress(self):
+        @scenario()
+        async def progress(session):
+            await asyncio.sleep(0.01)
+
+        stdout, stderr, rc = self._test_molotov(
+            "-q",
+            "--progress",
+            "json",
+            "--timeline-interval",
+            "0.2",
+            "--duration",
+            "1.1",
+            "-s",
+            "progress",
+            "molotov.tests.test_run",
+        )
+        lines = [json.loads(line) for line in stdout.split("\n")]
+        self.assertTrue(len(lines) >= 3, stdout)
+        self.assertEqual(lines[0]["elapsed"], 0.2)
+        self.assertEqual(lines[0]["workers"], 1)
+        self.assertEqual(lines[0]["processes"], 1)
+        self.assertTrue(lines[-1]["ok"] > 0)
+        # the last interval is written once the run is over
+        self.assertEqual(lines[-1]["workers"], 0)
+        self.assertTrue(all(line["rps"] > 0 and line["p99"] > 0 for line in lines[:-1]), stdout)
+
+    @dedicatedloop
+    def test_progress_output(self):
+        @scenario()
+        async def progress(session):
+            await asyncio.sleep(0.01)
+
+        fd, path = tempfile.mkstemp(suffix=".jsonl")
+        os.close(fd)
+        try:
+            stdout, stderr, rc = self._test_molotov(
+                "--progress",
+                "json",
+                "--progress-output",
+                path,
+                "--timeline-interval",
+                "0.2",
+                "--duration",
+                "0.5",
+                "-s",
+                "progress",
+                "molotov.tests.test_run",
+            )
+            with open(path) as f:
+                lines = [json.loads(line) for line in f]
+        finally:
+            os.remove(path)
+        self.assertTrue(len(lines) >= 1)
+        # the worker chatter is not displayed
+        self.assertFalse("[W:0]" in stdout, stdout)
+        # the last line has the final totals
+        successes = int(re.search(r"SUCCESSES: (\d+)", stdout).group(1))
+        self.assertEqual(lines[-1]["ok"], successes)
+
+    @dedicatedloop
+    def test_progress_output_alone(self):
+        stdout, stderr, rc = self._test_molotov(
+            "--progress-output", "progress.jsonl", "molotov.tests.test_run"
+        )
+        self.assertTrue("--progress-output needs --progress" in stdout, stdout)
+
+    @dedicatedloop
+    def test_output_bad_format(self):
+        stdout, stderr, rc = self._test_molotov("-o", "results.txt", "molotov.tests.test_run")
+        self.assertTrue("The --output file needs" in stdout, stdout)
+
+    @co_catch_output
+    @dedicatedloop
+    def test_samples(self):
+        with coserver() as port:
+
+            @scenario()
+            async def sampled(session):
+                async with session.get("http://localhost:%s" % port) as resp:
+                    await resp.text()
+
+            fd, path = tempfile.mkstemp(suffix=".csv")
+            os.close(fd)
+            try:
+                args = self._get_args()
+                args.max_runs = 3
+                args.duration = 9999
+                args.samples = path
+                run(args, stream=io.StringIO())
+
+                with open(path) as f:
+                    lines = f.read().strip().split("\n")
+            finally:
+                os.remove(path)
+
+        # header, 3 scenarios and 3 requests
+        self.assertEqual(len(lines), 7)
+        self.assertEqual(len([line for line in lines if ",scenario,sampled,OK," in line]), 3)
+        self.assertEqual(len([line for line in lines if ",request,GET localhost/,200," in line]), 3)
+
+    @dedicatedloop
+    def test_shared_connector(self):
+        connectors = []
+
+        @setup_session()
+        async def _setup_session(wid, session):
+            connectors.append(session.connector)
+
+        with coserver() as port:
+
+            @scenario()
+            async def shared(session):
+                async with session.get("http://localhost:%s" % port) as resp:
+                    await resp.text()
+
+            args = self._get_args()
+            args.workers = 3
+            args.max_runs = 2
+            args.duration = 9999
+            args.connector = "shared"
+            args.connector_limit_per_host = 2
+            results = run(args, stream=io.StringIO())
+
+        self.assertEqual(results["OK"], 6)
+        self.assertEqual(len(connectors), 3)
+        connector = connectors[0]
+        self.assertTrue(all(item is connector for item in connectors))
+        self.assertEqual(connector.limit_per_host, 2)
+        self.assertTrue(connector.closed)
+
+    def test_connector_negative_limit(self):
+        stdout, stderr, rc = self._test_molotov("--connector-limit", "-1", "molotov.tests.test_run")
+        self.assertTrue("The connector limits can't be negative" in stdout, stdout)
@@ -0,0 +1,53 @@
+import csv
+import os
+import queue
+import tempfile
+import unittest
+from time import perf_counter
+
+from molotov.samples import COLUMNS, SampleWriter, samples_path
+
+
+class TestSamples(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".csv")
+        os.close(fd)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def _read(self):
+        with open(self.path) as f:
+            return list(csv.reader(f))
+
+    def test_write(self):
+        writer = SampleWriter(self.path, batch_size=2)
+        for i in range(5):
+            writer.add("scenario", "one", "OK", perf_counter(), 0.1 * i, 1)
+        writer.add("request", "GET localhost/", 200, perf_counter(), 0.2, 1)
+        writer.close()
+        writer.close()
+
+        rows = self._read()
+        self.assertEqual(tuple(rows[0]), COLUMNS)
+        self.assertEqual(len(rows), 7)
+        self.assertEqual(rows[2][1:6], ["scenario", "one", "OK", "0.100000", "1"])
+        self.assertEqual(rows[-1][3], "200")
+        self.assertEqual(rows[-1][6], str(os.getpid()))
+
+    def test_dropped(self):
+        writer = SampleWriter(self.path, batch_size=1, max_batches=1)
+        # the thread can't keep up, the queue is full
+        full = queue.Queue(maxsize=1)
+        full.put([])
+        batches, writer._batches = writer._batches, full
+        for _ in range(3):
+            writer.add("scenario", "one", "OK", perf_counter(), 0.1, 1)
+        self.assertEqual(writer.dropped, 3)
+        writer._batches = batches
+        writer.close()
+        self.assertEqual(len(self._read()), 1)
+
+    def test_samples_path(self):
+        self.assertEqual(samples_path("samples.csv", 0), "samples.csv")
+        self.assertEqual(samples_path("samples.csv", 2, processes=4), "samples.2.csv")
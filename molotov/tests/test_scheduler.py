@@ -0,0 +1,59 @@
+import asyncio
+
+from molotov.scheduler import Scheduler
+from molotov.shared.counter import Counters
+from molotov.tests.support import TestLoop, async_test
+
+
+class TestScheduler(TestLoop):
+    def _results(self):
+        return Counters("DROPPED", "LATE")
+
+    @async_test
+    async def test_constant_rate(self, loop, console, results):
+        results = self._results()
+        scheduler = Scheduler(100, results, pool_size=2, duration=0.3)
+        starts = []
+
+        async def worker():
+            while True:
+                start = await scheduler.next_start()
+                if start is None:
+                    return
+                starts.append(start)
+
+        await asyncio.gather(scheduler.run(), worker(), worker())
+        self.assertTrue(25 <= len(starts) <= 32, len(starts))
+        # intended starts are evenly spaced
+        self.assertAlmostEqual(starts[1] - starts[0], 0.01, places=5)
+        self.assertEqual(results["DROPPED"].value, 0)
+
+    @async_test
+    async def test_dropped(self, loop, console, results):
+        results = self._results()
+        scheduler = Scheduler(1000, results, pool_size=1, duration=0.1)
+
+        async def slow_worker():
+            while True:
+                start = await scheduler.next_start()
+                if start is None:
+                    return
+                await asyncio.sleep(0.05)
+
+        await asyncio.gather(scheduler.run(), slow_worker())
+        self.assertTrue(results["DROPPED"].value > 0)
+        self.assertTrue(results["LATE"].value > 0)
+
+    def test_step_rate(self):
+        scheduler = Scheduler(100, self._results(), 1, arrival="step", ramp_up=10, steps=5)
+        self.assertEqual(scheduler.current_rate(0), 20)
+        self.assertEqual(scheduler.current_rate(2.5), 40)
+        self.assertEqual(scheduler.current_rate(100), 100)
+
+    def test_poisson_rate(self):
+        scheduler = Scheduler(100, self._results(), 1, arrival="poisson")
+        intervals = [scheduler._interval(0) for _ in range(5000)]
+        self.assertAlmostEqual(sum(intervals) / len(intervals), 0.01, delta=0.001)
+
+    def test_bad_rate(self):
+        self.assertRaises(ValueError, Scheduler, 0, self._results(), 1)
@@ -22,6 +22,18 @@ class TestLoggedClientSession(TestLoop):
     def _get_session(self, *args, **kw):
         return molotov.session.get_session(*args, **kw)
 
+    def test_labels_cache(self):
+        _statsd_labels = molotov.session._statsd_labels
+        _statsd_labels.cache_clear()
+        host = molotov.session._HOST
+        for _ in range(3):
+            label, status_label = _statsd_labels("GET", "example.com", "/api", 200)
+        self.assertEqual(label, "molotov.%s.GET.example.com./api" % host)
+        self.assertEqual(status_label, label + ".200")
+        info = _statsd_labels.cache_info()
+        self.assertEqual((info.hits, info.misses), (2, 1))
+        self.assertEqual(info.maxsize, molotov.session._LABELS_CACHE_SIZE)
+
     @async_test
     async def test_add_listener(self, loop, console, results):
         class MyListener(BaseListener):
@@ -3,10 +3,11 @@ import unittest
 
 import multiprocess
 
-from molotov.shared.counter import Counter, Counters
+from molotov.shared.counter import Counter, Counters, SlottedCounter, set_slot
 
-# pre-forked variable
+# pre-forked variables
 _DATA = Counters("test")
+_SLOTTED = Counters("test", "reached", slots=4, gauges=("reached",))
 
 
 def run_worker(value):
@@ -15,6 +16,13 @@ def run_worker(value):
     _DATA["test"] += value
 
 
+def run_slotted_worker(slot):
+    set_slot(slot)
+    for _ in range(1000):
+        _SLOTTED["test"] += 1
+    _SLOTTED["reached"] = 1
+
+
 class TestCounters(unittest.TestCase):
     def test_operators(self):
         c1 = Counter("ok")
@@ -83,3 +91,49 @@ class TestCounters(unittest.TestCase):
             self.assertEqual(_DATA["test"].value, 3000)
         finally:
             pool.close()
+
+    def test_slotted_operators(self):
+        c1 = SlottedCounter("ok", 2)
+        c1 += 4
+        c1 -= 1
+        self.assertEqual(c1, 3)
+        c1.value = 10
+        self.assertEqual(c1.value, 10)
+        self.assertRaises(NotImplementedError, c1.__add__, 6.2)
+        self.assertRaises(TypeError, setattr, c1, "value", "1")
+
+    def test_slotted_setter(self):
+        counter = SlottedCounter("ok", 3)
+        try:
+            set_slot(1)
+            counter += 5
+            set_slot(2)
+            counter += 7
+            # setting the value only touches the current slot
+            counter.value = 0
+            self.assertEqual(counter.value, 0)
+            self.assertEqual(counter._slots[1], 5)
+            set_slot(1)
+            counter += 1
+            self.assertEqual(counter.value, 1)
+        finally:
+            set_slot(0)
+
+    @unittest.skipIf(os.name == "nt", "win32")
+    def test_slotted_multiprocess(self):
+        procs = [multiprocess.Process(target=run_slotted_worker, args=(i,)) for i in (1, 2, 3)]
+        for proc in procs:
+            proc.start()
+        for proc in procs:
+            proc.join()
+        self.assertEqual(_SLOTTED["test"].value, 3000)
+        # set by all the processes
+        self.assertEqual(_SLOTTED["reached"].value, 1)
+
+    def test_gauges(self):
+        data = Counters("ok", "reached", slots=3, gauges=("reached",))
+        self.assertTrue(isinstance(data["ok"], SlottedCounter))
+        self.assertFalse(isinstance(data["reached"], SlottedCounter))
+        data["ok"] += 1
+        data["reached"] = 1
+        self.assertEqual(data.to_dict(), {"ok": 1, "reached": 1})
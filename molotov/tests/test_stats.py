@@ -0,0 +1,63 @@
+import asyncio
+
+from molotov.stats import BatchingClient, get_statsd_client
+from molotov.tests.support import TestLoop, async_test
+
+
+class FakeProtocol:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, data):
+        self.sent.append(data)
+
+
+class TestBatchingClient(TestLoop):
+    def _client(self, **kw):
+        client = BatchingClient(**kw)
+        client._protocol = FakeProtocol()
+        client._pending_queue = asyncio.Queue()
+        return client
+
+    def test_get_statsd_client(self):
+        client = get_statsd_client("udp://localhost:9999")
+        self.assertTrue(isinstance(client, BatchingClient))
+        self.assertEqual(client._port, 9999)
+
+    @async_test
+    async def test_batching(self, loop, console, results):
+        client = self._client()
+        for i in range(5):
+            client._pending_queue.put_nowait(b"metric.%d:1|c" % i)
+
+        await client._listen_and_send()
+
+        self.assertEqual(
+            client._protocol.sent,
+            [b"\n".join(b"metric.%d:1|c" % i for i in range(5))],
+        )
+        self.assertTrue(client._pending_queue.empty())
+
+    @async_test
+    async def test_max_packet_size(self, loop, console, results):
+        client = self._client(max_packet_size=30)
+        for i in range(5):
+            client._pending_queue.put_nowait(b"metric.%d:1|c" % i)
+
+        await client._listen_and_send()
+
+        # 12 bytes per metric, two per datagram
+        self.assertEqual(
+            client._protocol.sent,
+            [
+                b"metric.0:1|c\nmetric.1:1|c",
+                b"metric.2:1|c\nmetric.3:1|c",
+                b"metric.4:1|c",
+            ],
+        )
+
+    @async_test
+    async def test_nothing_to_send(self, loop, console, results):
+        client = self._client(read_timeout=0.01)
+        await client._listen_and_send()
+        self.assertEqual(client._protocol.sent, [])
@@ -0,0 +1,59 @@
+import unittest
+
+from molotov.shared.timeline import (
+    Timeline,
+    interval_summary,
+    merge_timelines,
+    timeline_rows,
+    window_summary,
+)
+
+
+class TestTimeline(unittest.TestCase):
+    def test_record(self):
+        timeline = Timeline(100.0, interval=1.0, size=10)
+        timeline.record("one", 100.5, 0.1)
+        timeline.record("one", 100.7, 0.3, failed=True)
+        timeline.record("two", 101.2, 0.2)
+
+        snapshot = timeline.snapshot()
+        self.assertEqual(sorted(snapshot), [0, 1])
+        counts, count, failed, total, max_ = snapshot[0]["one"]
+        self.assertEqual((count, failed, total, max_), (2, 1, 400000, 300000))
+        self.assertEqual(list(timeline.snapshot(since=1)), [1])
+        self.assertEqual(list(timeline.get(1)), ["two"])
+        self.assertEqual(timeline.get(5), {})
+
+    def test_ring(self):
+        timeline = Timeline(0.0, interval=1.0, size=3)
+        for second in range(5):
+            timeline.record("one", second + 0.5, 0.1)
+        # only the last 3 intervals are kept
+        self.assertEqual(sorted(timeline.snapshot()), [2, 3, 4])
+        self.assertEqual(timeline.get(0), {})
+
+    def test_merge_and_rows(self):
+        one = Timeline(0.0, interval=0.5)
+        two = Timeline(0.0, interval=0.5)
+        one.record("one", 0.1, 0.1)
+        two.record("one", 0.2, 0.2, failed=True)
+        two.record("one", 0.7, 0.2)
+
+        merged = merge_timelines([one.snapshot(), two.snapshot()])
+        rows = timeline_rows(merged, 0.5)
+        self.assertEqual([(row["time"], row["count"]) for row in rows], [(0.0, 2), (0.5, 1)])
+        self.assertEqual(rows[0]["failed"], 1)
+        self.assertEqual(rows[0]["rps"], 4.0)
+        self.assertEqual(rows[0]["max"], 0.2)
+
+        summary = interval_summary(merged, 0, 0.5)
+        self.assertEqual(summary["count"], 2)
+        self.assertEqual(summary["failed"], 1)
+        self.assertEqual(interval_summary(merged, 10, 0.5)["rps"], 0.0)
+
+        summary = window_summary(merged, 0, 1, 0.5)
+        self.assertEqual(summary["count"], 3)
+        self.assertEqual(summary["rps"], 3.0)
+
+        # keeping only the last interval
+        self.assertEqual(list(merge_timelines([one.snapshot(), two.snapshot()], size=1)), [1])
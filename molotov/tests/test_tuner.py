@@ -0,0 +1,42 @@
+import unittest
+
+from molotov.tuner import Tuner
+
+
+def _throughput(concurrency):
+    # the service saturates at 10 concurrent requests
+    return {"rps": min(concurrency, 10) * 100.0, "p99": 0.01, "failed": 0}
+
+
+class TestTuner(unittest.TestCase):
+    def _run(self, tuner):
+        tried = []
+        while tuner.next_concurrency() is not None:
+            concurrency = tuner.next_concurrency()
+            tried.append(concurrency)
+            tuner.add(concurrency, _throughput(concurrency))
+        return tried
+
+    def test_knee(self):
+        tuner = Tuner(start=1, max_workers=100)
+        tried = self._run(tuner)
+        # growing, then bisecting between 8 and 16
+        self.assertEqual(tried, [1, 2, 4, 8, 16, 32, 12, 10, 9])
+        # 9 workers get within 10% of the best throughput
+        self.assertEqual(tuner.knee["concurrency"], 9)
+        self.assertEqual(tuner.knee["rps"], 900.0)
+        self.assertEqual([stage["concurrency"] for stage in tuner.results()], sorted(tried))
+
+    def test_max_workers(self):
+        tuner = Tuner(start=2, max_workers=6)
+        self.assertEqual(self._run(tuner), [2, 4, 6, 5])
+        self.assertEqual(tuner.knee["concurrency"], 6)
+
+    def test_flat(self):
+        tuner = Tuner(start=10, max_workers=100)
+        self.assertEqual(self._run(tuner), [10, 20])
+        self.assertEqual(tuner.knee["concurrency"], 10)
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, Tuner, start=0)
+        self.assertRaises(ValueError, Tuner, start=10, max_workers=5)
@@ -1,10 +1,11 @@
 import json
 import os
+import time
 import unittest
 from io import StringIO
 from tempfile import mkstemp
 
-from molotov.util import _VARS, OptionError, expand_options, get_var, set_var
+from molotov.util import _VARS, OptionError, expand_options, get_var, now, set_var
 
 _HERE = os.path.dirname(__file__)
 config = os.path.join(_HERE, "..", "..", "molotov.json")
@@ -24,6 +25,13 @@ class TestUtil(unittest.TestCase):
         expand_options(config, "test", args)
         self.assertEqual(args.duration, 1)
 
+    def test_now(self):
+        first = now()
+        time.sleep(0.01)
+        second = now()
+        self.assertTrue(isinstance(first, float))
+        self.assertTrue(0.01 <= second - first < 1.0, second - first)
+
     def _get_config(self, data):
         data = json.dumps(data)
         data = StringIO(data)
@@ -0,0 +1,39 @@
+import unittest
+
+from molotov.shared import SlidingWindow
+
+
+class TestSlidingWindow(unittest.TestCase):
+    def test_totals(self):
+        window = SlidingWindow(size=10)
+        for now in range(5):
+            window.add(True, now=now)
+            window.add(False, now=now + 0.5)
+        self.assertEqual(window.totals(now=4), (5, 5))
+        self.assertEqual(window.ratio(now=4), 100.0)
+
+    def test_sliding(self):
+        window = SlidingWindow(size=10)
+        for now in range(20):
+            window.add(now % 2 == 0, now=now)
+        # only seconds 10 to 19 are in the window
+        self.assertEqual(window.totals(now=19), (5, 5))
+        # the window moves without new results
+        self.assertEqual(window.totals(now=25), (2, 2))
+        self.assertEqual(window.totals(now=100), (0, 0))
+        self.assertEqual(window.ratio(now=100), 0.0)
+
+    def test_no_success(self):
+        window = SlidingWindow(size=10)
+        window.add(False, now=1)
+        self.assertEqual(window.ratio(now=1), 100.0)
+
+    def test_clock(self):
+        clock = [100.0]
+        window = SlidingWindow(size=60, clock=lambda: clock[0])
+        window.add(True)
+        clock[0] = 130.0
+        window.add(False)
+        self.assertEqual(window.totals(), (1, 1))
+        clock[0] = 161.0
+        self.assertEqual(window.totals(), (0, 1))
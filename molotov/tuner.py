@@ -0,0 +1,64 @@
+import math
+
+
+class Tuner:
+    """Searches the concurrency where the throughput stops growing.
+
+    The concurrency starts at `start` and is multiplied by `factor` after
+    each stage, as long as the throughput grows by more than `threshold`
+    (0.1 is 10%) compared to the best stage so far.
+
+    The knee is the lowest concurrency that gets within `threshold` of the
+    best throughput. Once the throughput stops growing, the concurrency is
+    bisected around the knee until the stages are less than `precision`
+    (0.1 is 10%) apart.
+    """
+
+    def __init__(self, start=1, max_workers=512, factor=2.0, threshold=0.1, precision=0.1):
+        if start < 1 or max_workers < start:
+            raise ValueError("The concurrency needs to be between 1 and max_workers")
+        self.max_workers = max_workers
+        self.factor = factor
+        self.threshold = threshold
+        self.precision = precision
+        self.stages = []
+        self.knee = None
+        self._next = start
+        self._growing = True
+
+    def next_concurrency(self):
+        """Returns the concurrency of the next stage, or None when done."""
+        return self._next
+
+    def add(self, concurrency, stats):
+        """Adds the results of a stage and picks the next concurrency."""
+        best = max((stage["rps"] for stage in self.stages), default=0.0)
+        self.stages.append(dict(stats, concurrency=concurrency))
+
+        if self._growing:
+            improved = stats["rps"] > best * (1 + self.threshold)
+            if improved and concurrency < self.max_workers:
+                grown = int(math.ceil(concurrency * self.factor))
+                self._next = min(max(grown, concurrency + 1), self.max_workers)
+                self._update_knee()
+                return
+            self._growing = False
+
+        lower, upper = self._update_knee()
+        if lower is None or upper - lower <= max(1, lower * self.precision):
+            self._next = None
+        else:
+            self._next = (lower + upper) // 2
+
+    def _update_knee(self):
+        # returns the highest unsaturated and the lowest saturated concurrency
+        saturated = max(stage["rps"] for stage in self.stages) * (1 - self.threshold)
+        stages = self.results()
+        self.knee = next(stage for stage in stages if stage["rps"] >= saturated)
+        upper = self.knee["concurrency"]
+        below = [stage["concurrency"] for stage in stages if stage["concurrency"] < upper]
+        return (max(below) if below else None), upper
+
+    def results(self):
+        """Returns the stages sorted by concurrency."""
+        return sorted(self.stages, key=lambda stage: stage["concurrency"])
@@ -19,6 +19,7 @@ from molotov.ui.controllers import (
     RunStatus,
     SimpleController,
     TerminalController,
+    TopErrors,
     create_key_bindings,
 )
 from molotov.util import cancellable_sleep
@@ -61,6 +62,7 @@ class MolotovApp:
         else:
             self.terminal = self.errors = None
         self.status = RunStatus()
+        self.top_errors = TopErrors()
         self.key_bindings = create_key_bindings()
         self.refresh_interval = refresh_interval
         self._running = False
@@ -102,17 +104,21 @@ class MolotovApp:
             height=1,
         )
 
+        # grows with the number of error origins
+        errors_table = Window(content=self.top_errors, dont_extend_height=True)
+
         if self.terminal is not None:
             terminal = Window(content=self.terminal, height=self.max_lines + 2)
             errors = Window(content=self.errors, height=self.max_lines + 2)
             splits = [
                 title_toolbar,
                 VSplit([terminal, Window(width=4, char=" || "), errors]),
+                errors_table,
                 bottom_toolbar,
             ]
 
         else:
-            splits = [title_toolbar, bottom_toolbar]
+            splits = [title_toolbar, errors_table, bottom_toolbar]
 
         self.app = Application(
             min_redraw_interval=0.05,
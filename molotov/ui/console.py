@@ -27,6 +27,7 @@ class Console:
         self.terminal = self.ui.terminal
         self.errors = self.ui.errors
         self.status = self.ui.status
+        self.top_errors = self.ui.top_errors
         self.started = False
 
     async def start(self):
@@ -39,6 +40,7 @@ class Console:
 
     def print_results(self, results):
         self.status.update(results)
+        self.top_errors.update(results)
 
     def print(self, data):
         if self.terminal is None:
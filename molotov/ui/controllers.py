@@ -1,16 +1,45 @@
+import functools
+import html
 import os
 import queue
 import signal
 from datetime import datetime
+from xml.parsers.expat import ExpatError
 
 import humanize
-from multiprocess import Manager  # type: ignore
 from multiprocess import Queue as MQueue  # type: ignore
 from prompt_toolkit import HTML
 from prompt_toolkit.formatted_text import to_formatted_text
 from prompt_toolkit.key_binding import KeyBindings
 from prompt_toolkit.layout.controls import UIContent, UIControl
 
+from molotov.errors import format_categories
+from molotov.shared.ring import RingBuffer
+
+# longest line displayed by the terminal, longer lines are truncated
+_MAX_LINE_LENGTH = 256
+# bytes of a slot of the ring buffer: a truncated line is escaped, so each
+# character takes at most 5 bytes, plus the style and the pid header
+_LINE_SIZE = (_MAX_LINE_LENGTH + 3) * 5 + 128
+# number of formatted lines kept, the same lines are often written again
+_FORMAT_CACHE_SIZE = 1024
+
+
+@functools.lru_cache(maxsize=_FORMAT_CACHE_SIZE)
+def _format_line(line):
+    try:
+        return to_formatted_text(HTML(line))
+    except ExpatError:
+        # errors and tracebacks may hold a stray < like <module>
+        return to_formatted_text(HTML(html.escape(line, quote=False)))
+
+
+def _format_lines(data):
+    # a write ends with a new line
+    if data.endswith("\n"):
+        data = data[:-1]
+    return [_format_line(line) for line in data.split("\n")]
+
 
 def create_key_bindings():
     kb = KeyBindings()
@@ -65,13 +94,22 @@ class TerminalController(BaseController):
         super().__init__(max_lines, add_style=True)
         self.single_process = single_process
         if not single_process:
-            self.manager = Manager()
-            self.data = self.manager.list()
+            # shared with the forked processes
+            self.data = RingBuffer(max(max_lines, 1), line_size=_LINE_SIZE)
         else:
             self.data = list()
         self._closed = False
+        # bumped on every change of the single process list
+        self._version = 0
+        # the content is rebuilt only when the lines changed
+        self._content = None
+        self._content_key = None
 
     def dump(self, max_lines=25):
+        if not self.single_process:
+            yield from self.data.pop(max_lines)
+            return
+        self._version += 1
         for line in self.data[:max_lines]:
             yield line
         if len(self.data) <= max_lines:
@@ -81,40 +119,51 @@ class TerminalController(BaseController):
 
     def close(self):
         self._closed = True
-        if not self.single_process:
-            self.manager.shutdown()
+
+    def write_line(self, data, fg=None):
+        # lines need to fit in the slots of the ring buffer. The payload is
+        # truncated before the style is added, and escaped since the cut
+        # may fall in the middle of its own markup
+        if not self.single_process and len(data) > _MAX_LINE_LENGTH:
+            data = html.escape(data[:_MAX_LINE_LENGTH], quote=False) + "..."
+        super().write_line(data, fg)
 
     def write(self, data):
         if self._closed:
             return
-        try:
-            self.data.append(data)
+        self.data.append(data)
+        if self.single_process:
+            # formats the lines now, so the refresh only looks them up
+            _format_lines(data)
+            self._version += 1
             if len(self.data) > self.max_lines:
                 self.data[:] = self.data[-self.max_lines :]
-        except BrokenPipeError:
-            pass
 
-    def create_content(self, width, height):
-        items = ["\n"]
+    def lines(self):
+        if not self.single_process:
+            return self.data.lines()
+        return list(self.data)
 
-        def format_items():
-            lines = "".join(items).split("\n")
-            items[:] = [to_formatted_text(HTML(line)) for line in lines]  # type: ignore
+    def create_content(self, width, height):
+        version = self.data.version if not self.single_process else self._version
+        key = (self._closed, version)
+        if self._content is None or key != self._content_key:
+            self._content = self._create_content()
+            self._content_key = key
+        return self._content
+
+    def _create_content(self):
+        items = [_format_line("")]
+        if self._closed:
+            items.append(_format_line("data stream closed!"))
+        else:
+            for data in self.lines():
+                items.extend(_format_lines(data))
+            items.append(_format_line(""))
 
         def get_line(i):
             return items[i]
 
-        if self._closed:
-            items.append("data stream closed!")
-            format_items()
-            return UIContent(
-                get_line=get_line, line_count=len(items), show_cursor=False
-            )
-
-        for line in self.data:
-            items.append(line)
-
-        format_items()
         return UIContent(get_line=get_line, line_count=len(items), show_cursor=False)
 
 
@@ -150,12 +199,24 @@ class RunStatus(BaseController):
 
     def formatted(self):
         delta = datetime.now() - self._started
+        if "RPS" in self._status:
+            rates = (
+                f' RPS: {self._status["RPS"]:.1f}'
+                f' P99: {self._status["P99"] * 1000:.1f}ms '
+            )
+        else:
+            rates = ""
+        categories = format_categories(self._status)
+        if categories:
+            categories = f'<style fg="red" bg="#cecece">({categories}) </style>'
         return to_formatted_text(
             HTML(
                 f'<style fg="green" bg="#cecece">SUCCESS: {self._status.get("OK", 0)} </style>'
                 f'<style fg="red" bg="#cecece"> FAILED: {self._status.get("FAILED", 0)} </style>'
+                f"{categories}"
                 f' WORKERS: {self._status.get("WORKER", 0)}'
                 f' PROCESSES: {self._status.get("PROCESS", 0)} '
+                f"{rates}"
                 f'<style fg="blue" bg="#cecece"> ELAPSED: {humanize.precisedelta(delta)}</style>'
             )
         )
@@ -165,3 +226,29 @@ class RunStatus(BaseController):
             return self.formatted()
 
         return UIContent(get_line=get_line, line_count=1, show_cursor=False)
+
+
+class TopErrors(BaseController):
+    """Displays the most frequent error origins, one per line."""
+
+    def __init__(self, max_lines=3):
+        super().__init__(max_lines)
+        self._errors = []
+
+    def update(self, results):
+        self._errors = results.get("TOP_ERRORS", [])[: self.max_lines]
+
+    def preferred_height(self, width, max_available_height, wrap_lines, get_line_prefix):
+        return len(self._errors)
+
+    def create_content(self, width: int, height: int) -> UIContent:
+        # origins like <string>:1 need to be escaped
+        lines = [
+            to_formatted_text(HTML('<style fg="red">{:>8}</style> {}').format(count, origin))
+            for origin, count in self._errors
+        ]
+
+        def get_line(i):
+            return lines[i]
+
+        return UIContent(get_line=get_line, line_count=len(lines), show_cursor=False)
@@ -10,7 +10,6 @@ from io import StringIO
 
 from aiohttp import ClientSession, __version__
 
-_DNS_CACHE = {}
 _STOP = False
 _STOP_WHY = []
 _TIMER = None
@@ -36,7 +35,7 @@ def get_timer():
 def set_timer(value=None):
     global _TIMER
     if value is None:
-        value = int(time.time())
+        value = now()
     _TIMER = value
 
 
@@ -225,4 +224,8 @@ def printable_error(error, tb=None):
 
 
 def now():
-    return int(time.time())
+    """Returns a monotonic time in seconds, with a sub-millisecond resolution.
+
+    Only the difference between two values is meaningful.
+    """
+    return time.perf_counter()
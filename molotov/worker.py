@@ -1,10 +1,13 @@
 import asyncio
-from inspect import isgenerator, signature
+from inspect import isgenerator
+from time import perf_counter
 
 from molotov.api import get_fixture, get_scenario, next_scenario, pick_scenario
+from molotov.errors import classify, fingerprint
 from molotov.listeners import EventSender
 from molotov.session import get_context, get_session
-from molotov.util import cancellable_sleep, get_timer, is_stopped, now, set_timer, stop
+from molotov.shared import Histograms, SlidingWindow
+from molotov.util import cancellable_sleep, is_stopped, now, stop
 
 
 class FixtureError(Exception):
@@ -23,6 +26,15 @@ class Worker:
         statsd=None,
         delay=0,
         loop=None,
+        histograms=None,
+        scheduler=None,
+        timeline=None,
+        samples=None,
+        connector=None,
+        normalizer=None,
+        window=None,
+        pacer=None,
+        origins=None,
     ):
         self.wid = wid
         self.results = results
@@ -31,10 +43,37 @@ class Worker:
         self.args = args
         self.statsd = statsd
         self.delay = delay
+        if histograms is None:
+            histograms = Histograms()
+        self.histograms = histograms
+        # when set, scenarios are started by the scheduler (--rate)
+        self.scheduler = scheduler
+        self.timeline = timeline
+        # when set, every sample is streamed to disk (--samples)
+        self.samples = samples
+        # when set, http sessions use this connector (--connector shared)
+        self.connector = connector
+        # when set, normalizes the paths of the request labels
+        self.normalizer = normalizer
+        # successes and failures of the last minute, for --sizing
+        if window is None:
+            window = SlidingWindow()
+        self.window = window
+        # when set, paces the iterations (--pace)
+        self.pacer = pacer
+        # number of failures by error origin
+        if origins is None:
+            origins = {}
+        self.origins = origins
+        if args.co_correction:
+            self._co_interval = args.co_interval or args.pace or args.delay
+        else:
+            self._co_interval = None
         self.count = 0
         self.worker_start = 0
         self.eventer = EventSender(console)
         self._exhausted = False
+        self._retired = False
         # fixtures
         self._session_setup = get_fixture("setup_session")
         self._session_teardown = get_fixture("teardown_session")
@@ -45,8 +84,8 @@ class Worker:
     def print(self, line):
         self.console.print(f"[W:{self.wid}] {line}")
 
-    async def send_event(self, event, **options):
-        await self.eventer.send_event(event, wid=self.wid, **options)
+    def send_event(self, event, **options):
+        return self.eventer.send_event(event, wid=self.wid, **options)
 
     async def run(self):
         self.print("Starting")
@@ -69,7 +108,7 @@ class Worker:
             return False
         if now() - self.worker_start > self.args.duration:
             return False
-        if self._exhausted:
+        if self._exhausted or self._retired:
             return False
         if self.results["REACHED"] == 1:
             return False
@@ -77,6 +116,10 @@ class Worker:
             return False
         return True
 
+    def retire(self):
+        """Stops the worker once its current scenario is over."""
+        self._retired = True
+
     async def setup(self):
         if self._setup is None:
             return {}
@@ -122,6 +165,8 @@ class Worker:
             session = self._active_sessions[kind]
         else:
             self.print(f"Setting up session of kind {kind}")
+            if kind == "http" and self.connector is not None and "connector" not in options:
+                options = dict(options, connector=self.connector, connector_owner=False)
             # needs creation
             session = get_session(
                 self.loop,
@@ -136,6 +181,11 @@ class Worker:
             if context is not None:
                 context.args = self.args  # type: ignore
                 context.worker_id = self.wid  # type: ignore
+                context.histograms = self.histograms  # type: ignore
+                context.results = self.results  # type: ignore
+                context.samples = self.samples  # type: ignore
+                context.normalizer = self.normalizer  # type: ignore
+                context.endpoints = self.args.endpoint_stats  # type: ignore
 
             try:
                 await self.session_setup(session)
@@ -180,26 +230,42 @@ class Worker:
         self.print("Running scenarios")
 
         while self._may_run():
+            intended_start = None
+            if self.scheduler is not None:
+                intended_start = await self.scheduler.next_start()
+                if intended_start is None:
+                    break
+            elif self.pacer is not None:
+                await self.pacer.wait()
+                if is_stopped():
+                    break
             if self.count % 10 == 0:
                 self.print(f"Ran {self.count} scenarios")
-            step_start = now()
-            result = await self.step(self.count, scenario=single, options=options)
+            result = await self.step(
+                self.count, scenario=single, options=options, start=intended_start
+            )
 
             if result == 1:
                 self.results["OK"] += 1
-                self.results["MINUTE_OK"] += 1
+                self.window.add(True)
             elif result != 0:
                 self.results["FAILED"] += 1
-                self.results["MINUTE_FAILED"] += 1
+                category = classify(result)
+                # results may not count the categories
+                if category in self.results:
+                    self.results[category] += 1
+                self.window.add(False)
                 if exception:
                     stop(why=result)
 
-            if not is_stopped() and self._reached_tolerance(step_start):
+            if not is_stopped() and self._reached_tolerance():
                 stop()
                 cancellable_sleep.cancel_all()
                 break
 
             self.count += 1
+            if self.scheduler is not None or self.pacer is not None:
+                continue
             if self.args.delay > 0.0:
                 await cancellable_sleep(self.args.delay)
             else:
@@ -218,37 +284,57 @@ class Worker:
             # we can't stop the teardown process
             self.console.print_error(e)
 
-    def _reached_tolerance(self, current_time):
+    def _reached_tolerance(self):
         if not self.args.sizing:
             return False
 
-        if current_time - get_timer() > 60:
-            # we need to reset the tolerance counters
-            set_timer(current_time)
-            self.results["MINUTE_OK"].value = 0
-            self.results["MINUTE_FAILED"].value = 0
-            return False
-
-        OK = self.results["MINUTE_OK"].value
-        FAILED = self.results["MINUTE_FAILED"].value
+        OK, FAILED = self.window.totals()
 
         if OK + FAILED < 100:
             # we don't have enough samples
             return False
 
-        current_ratio = float(FAILED) / float(OK) * 100.0
+        current_ratio = self.window.ratio()
         reached = current_ratio > self.args.sizing_tolerance
         if reached:
             self.results["REACHED"].value = 1
             self.results["RATIO"].value = int(current_ratio * 100)
+            self.results["MINUTE_OK"].value = OK
+            self.results["MINUTE_FAILED"].value = FAILED
 
         return reached
 
-    async def step(self, step_id, scenario=None, options=None):
+    def _record_failure(self, name, exc, elapsed):
+        end = perf_counter()
+        if self.timeline is not None:
+            self.timeline.record(name, end, elapsed, failed=True)
+        if self.samples is not None:
+            self.samples.add("scenario", name, type(exc).__name__, end, elapsed, self.wid)
+        self.histograms["failure", name].record(elapsed)
+        self.histograms["error", type(exc).__name__].record(elapsed)
+        origin = fingerprint(exc)
+        count = self.origins[origin] = self.origins.get(origin, 0) + 1
+        return count
+
+    def _print_failure(self, msg, exc, count):
+        # formatting tracebacks is slow, so only the first failures of
+        # each origin are displayed
+        max_tracebacks = self.args.max_tracebacks
+        if count > max_tracebacks:
+            return
+        self.print(msg)
+        self.console.print_error(exc)
+        if count == max_tracebacks:
+            self.print("Not displaying more %s failures" % fingerprint(exc))
+
+    async def step(self, step_id, scenario=None, options=None, start=None):
         """single scenario call.
 
         When it returns 1, it works. -1 the script failed,
         0 the test is stopping or needs to stop.
+
+        When provided, `start` is the perf_counter() time the scenario
+        was supposed to start, and its latency is measured from there.
         """
         if options is None:
             options = {}
@@ -270,37 +356,44 @@ class Worker:
             return exc
 
         func = scenario["func"]
-        sig = signature(func)
-        session_kind = sig.parameters.get("session_factory")
-
-        if session_kind is not None and session_kind.default is not None:
-            session_kind = session_kind.default
-            for name, param in sig.parameters.items():
-                if name == "session_factory":
-                    continue
-                options[name] = param.default
-        else:
-            session_kind = "http"
+        session_kind = scenario["session_kind"]
+        if scenario["session_options"]:
+            options.update(scenario["session_options"])
 
         try:
             session = await self._get_session(session_kind, **options)
         except Exception as exc:
+            count = self._record_failure(scenario["name"], exc, 0.0)
             await self.send_event("scenario_failure", scenario=scenario, exception=exc)
-            self.print("Session creation failure!")
-            self.console.print_error(exc)
+            self._print_failure("Session creation failure!", exc, count)
             return exc
 
+        latency = self.histograms["scenario", scenario["name"]]
+        elapsed = 0.0
         try:
             await self.send_event("scenario_start", scenario=scenario)
-            await func(session, *scenario["args"], **scenario["kw"])
+            if start is None:
+                start = perf_counter()
+            try:
+                await func(session, *scenario["args"], **scenario["kw"])
+            finally:
+                end = perf_counter()
+                elapsed = end - start
+                latency.record(elapsed)
+                if self._co_interval:
+                    corrected = self.histograms["corrected", scenario["name"]]
+                    corrected.record_corrected(elapsed, self._co_interval)
+            if self.timeline is not None:
+                self.timeline.record(scenario["name"], end, elapsed)
+            if self.samples is not None:
+                self.samples.add("scenario", scenario["name"], "OK", end, elapsed, self.wid)
             await self.send_event("scenario_success", scenario=scenario)
 
             if scenario["delay"] > 0.0:
                 await cancellable_sleep(scenario["delay"])
             return 1
         except Exception as exc:
+            count = self._record_failure(scenario["name"], exc, elapsed)
             await self.send_event("scenario_failure", scenario=scenario, exception=exc)
-            self.print("Failure!")
-            self.console.print_error(exc)
-
+            self._print_failure("Failure!", exc, count)
             return exc
@@ -9,7 +9,8 @@ from molotov import __version__  # NOQA
 
 install_requires = [
     "aiohttp>=3.9.0b1",
-    "aiodogstatsd",
+    # stats.BatchingClient relies on the internals of the client
+    "aiodogstatsd>=0.16.0,<0.17",
     "multiprocess",
     "humanize",
     "prompt_toolkit",